@@ -33,13 +33,30 @@ Several things happen when you do:
     file which was constructed and installed during SCons installation.
 
  3) All available input plugins and TrueType fonts are automatically registered.
+    With MAPNIK_LAZY_FONTS=1 in the environment font registration is deferred
+    until a map is first loaded or rendered. MAPNIK_FONT_INDEX names a file
+    caching the face names of each font so they are not re-probed on import.
+
+    MAPNIK_PLUGINS=shape,geojson restricts the input plugins that are loaded.
+    With MAPNIK_LAZY_PLUGINS=1 each plugin is only loaded when a datasource
+    of its type is first created, or before a map is first loaded or rendered.
+
+    startup_profile() reports the time spent in each phase of the import;
+    with MAPNIK_PROFILE_IMPORT=1 the first load_map and render are included.
 
 """
 
+import functools
 import itertools
 import os
+import threading
+import time
 import warnings
 
+# seconds spent in each startup phase, see startup_profile()
+_startup_profile = {}
+_startup_clock = time.perf_counter()
+
 def bootstrap_env():
     """
     If an optional settings file exists, inherit its
@@ -62,8 +79,12 @@ def bootstrap_env():
                 os.environ[key] = value
 
 bootstrap_env()
+_startup_profile['bootstrap_env'] = time.perf_counter() - _startup_clock
 
+_startup_clock = time.perf_counter()
 from ._mapnik import *
+from ._mapnik import _module_init_profile
+_startup_profile['import _mapnik'] = time.perf_counter() - _startup_clock
 
 def Shapefile(**keywords):
     """Create a Shapefile Datasource.
@@ -376,31 +397,191 @@ def Rasterlite(**keywords):
     keywords['type'] = 'rasterlite'
     return CreateDatasource(**keywords)
 
-def register_plugins(path=None):
-    """Register plugins located by specified path"""
+def register_plugins(path=None, plugins=None, lazy=False):
+    """Register plugins located by specified path
+
+    plugins restricts registration to the named plugins, e.g. ['shape', 'geojson'],
+    and defaults to the comma separated MAPNIK_PLUGINS environment variable.
+    With lazy=True the plugins are only recorded and each is loaded on first use.
+    """
     if not path:
         if 'MAPNIK_INPUT_PLUGINS_DIRECTORY' in os.environ:
             path = os.environ.get('MAPNIK_INPUT_PLUGINS_DIRECTORY')
         else:
             from .paths import inputpluginspath
             path = inputpluginspath
-    DatasourceCache.register_datasources(path, False)
+    if plugins is None and os.environ.get('MAPNIK_PLUGINS'):
+        plugins = [name.strip() for name in os.environ['MAPNIK_PLUGINS'].split(',')]
+    if plugins is None and not lazy:
+        DatasourceCache.register_datasources(path, False)
+        return
+    if not os.path.isdir(path):
+        # as register_datasources does, a missing directory registers nothing
+        return
+    for filename in sorted(os.listdir(path)):
+        name, ext = os.path.splitext(filename)
+        if ext == '.input' and (plugins is None or name in plugins):
+            _available_plugins[name] = os.path.join(path, filename)
+    if lazy:
+        _pending_registrations.append(_register_available_plugins)
+        _install_first_use_hooks()
+    else:
+        _register_available_plugins()
+
+
+# input plugins found by register_plugins but not loaded yet, by datasource type
+_available_plugins = {}
+_plugins_lock = threading.Lock()
+
+
+def _register_plugin(name):
+    with _plugins_lock:
+        path = _available_plugins.pop(name, None)
+        if path:
+            DatasourceCache.register_datasource(path)
+
+
+def _register_available_plugins():
+    for name in list(_available_plugins):
+        _register_plugin(name)
+
+
+def _with_plugin_registered(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if kwargs.get('type') in _available_plugins:
+            _register_plugin(kwargs['type'])
+        return func(*args, **kwargs)
+    return wrapper
 
 
 def register_fonts(path=None, valid_extensions=[
-                   '.ttf', '.otf', '.ttc', '.pfa', '.pfb', '.ttc', '.dfont', '.woff']):
-    """Recursively register fonts using path argument as base directory"""
+                   '.ttf', '.otf', '.ttc', '.pfa', '.pfb', '.ttc', '.dfont', '.woff'], index=None):
+    """Recursively register fonts using path argument as base directory
+
+    If an index file is given (or MAPNIK_FONT_INDEX is set) the faces it
+    lists are registered without opening the font files. Only fonts that
+    are new or changed since the index was written are probed, after which
+    the index is rewritten.
+    """
     if not path:
         if 'MAPNIK_FONT_DIRECTORY' in os.environ:
             path = os.environ.get('MAPNIK_FONT_DIRECTORY')
         else:
             from .paths import fontscollectionpath
             path = fontscollectionpath
+    if index is None:
+        index = os.environ.get('MAPNIK_FONT_INDEX')
+    indexed = set()
+    if index and os.path.exists(index):
+        try:
+            indexed = set(FontEngine.load_index(index))
+        except RuntimeError as e:
+            warnings.warn('Ignoring font index: {}'.format(e))
+    probed = False
+    fonts = []
     for dirpath, _, filenames in os.walk(path):
         for filename in filenames:
             if os.path.splitext(filename.lower())[1] in valid_extensions:
-                FontEngine.register_font(os.path.join(dirpath, filename))
-
-# # auto-register known plugins and fonts
-register_plugins()
-register_fonts()
+                font = os.path.join(dirpath, filename)
+                fonts.append(font)
+                if font not in indexed:
+                    FontEngine.register_font(font)
+                    probed = True
+    if index and (probed or not indexed):
+        try:
+            # files without faces are indexed too, so they are not probed again
+            FontEngine.save_index(index, fonts)
+        except RuntimeError as e:
+            warnings.warn('Could not save font index: {}'.format(e))
+
+# registrations postponed at import time, run before a map is first used
+_pending_registrations = []
+# held while the pending registrations run, see _register_pending
+_pending_lock = threading.Lock()
+
+# entry points needing fonts and plugins in place
+_FIRST_USE_FUNCTIONS = ['load_map', 'load_map_from_string', 'render', 'render_to_file',
+                        'render_layer', 'render_with_detector', 'render_metatile']
+
+
+def _register_pending():
+    """Run the registrations deferred at import time.
+
+    A registration stays in the list until it has finished, so a thread
+    finding the list non-empty waits on the lock until fonts and plugins
+    are fully registered instead of rendering with a partial set.
+    """
+    with _pending_lock:
+        while _pending_registrations:
+            try:
+                _pending_registrations[0]()
+            finally:
+                _pending_registrations.pop(0)
+
+
+def _after_pending_registrations(func):
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _pending_registrations:
+            _register_pending()
+        return func(*args, **kwargs)
+    return wrapper
+
+
+_first_use_hooks_installed = False
+
+
+def _install_first_use_hooks():
+    global _first_use_hooks_installed
+    if _first_use_hooks_installed:
+        return
+    _first_use_hooks_installed = True
+    for name in _FIRST_USE_FUNCTIONS:
+        globals()[name] = _after_pending_registrations(globals()[name])
+    FontEngine.face_names = staticmethod(_after_pending_registrations(FontEngine.face_names))
+    # CreateDatasource and Datasource(...) load their plugin in C++ (create_datasource.hpp)
+    DatasourceCache.create = staticmethod(_with_plugin_registered(DatasourceCache.create))
+
+
+def _timed(phase, func):
+    """Wrap func to record the duration of its first call as phase."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if phase in _startup_profile:
+            return func(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _startup_profile[phase] = time.perf_counter() - start
+    return wrapper
+
+
+def startup_profile():
+    """Return a dict of the wall time in seconds of each startup phase
+
+    Covers bootstrap_env, importing the _mapnik extension with its
+    export_* functions, plugin and font registration and, when the
+    MAPNIK_PROFILE_IMPORT environment variable is set, the first
+    load_map/load_map_from_string and render calls.
+    """
+    profile = dict(_startup_profile)
+    for name, seconds in _module_init_profile():
+        profile['_mapnik.' + name] = seconds
+    return profile
+
+
+# auto-register known plugins and fonts
+_timed('register_plugins', register_plugins)(lazy=bool(os.environ.get('MAPNIK_LAZY_PLUGINS')))
+if os.environ.get('MAPNIK_LAZY_FONTS'):
+    # opening every font face is by far the slowest part of import
+    _pending_registrations.append(_timed('register_fonts', register_fonts))
+    _install_first_use_hooks()
+else:
+    _timed('register_fonts', register_fonts)()
+if os.environ.get('MAPNIK_PROFILE_IMPORT'):
+    for _name in ('load_map', 'load_map_from_string', 'render'):
+        globals()[_name] = _timed('first ' + _name, globals()[_name])
+
+from .render_pool import RenderPool
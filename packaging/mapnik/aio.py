@@ -0,0 +1,158 @@
+#
+# This file is part of Mapnik (c++ mapping toolkit)
+# Copyright (C) 2024 Artem Pavlenko
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+
+"""asyncio coroutines for rendering and encoding.
+
+The work runs on a bounded pool of threads shared by the whole process.
+mapnik releases the GIL while it renders and encodes, so the event loop
+stays responsive. A job that has not started yet is dropped when its
+awaiting task is cancelled.
+
+>>> import mapnik.aio
+>>> data = await mapnik.aio.render_to_bytes(m, 'png8')
+>>> mapnik.aio.stats()
+{'workers': 8, 'queued': 0, 'running': 0, 'completed': 1, 'cancelled': 0}
+
+A Map must not be rendered by two jobs at the same time; use one Map per
+concurrent request, for example with copy.copy(m).
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import Image
+from . import render as _render
+
+__all__ = ['render', 'render_to_bytes', 'encode', 'stats', 'set_workers']
+
+
+class _Executor(object):
+    """ThreadPoolExecutor that keeps track of its queue depth."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers,
+                                        thread_name_prefix='mapnik-aio')
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._cancelled = 0
+
+    def _run(self, func, args):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def _done(self, future):
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+                self._cancelled += 1
+
+    def submit(self, func, *args):
+        with self._lock:
+            self._queued += 1
+        future = self._pool.submit(self._run, func, args)
+        future.add_done_callback(self._done)
+        return future
+
+    def stats(self):
+        with self._lock:
+            return {'workers': self.workers,
+                    'queued': self._queued,
+                    'running': self._running,
+                    'completed': self._completed,
+                    'cancelled': self._cancelled}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = int(os.environ.get('MAPNIK_AIO_WORKERS', 0)) or os.cpu_count() or 1
+            _executor = _Executor(workers)
+        return _executor
+
+
+def set_workers(workers):
+    """Set the number of worker threads used by the coroutines.
+
+    Jobs already submitted finish on the previous pool.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+        _executor = _Executor(workers)
+
+
+def stats():
+    """Return the queue depth and counters of the worker pool as a dict.
+
+    queued    -- jobs waiting for a worker thread
+    running   -- jobs currently rendering or encoding
+    completed -- jobs finished, successfully or not
+    cancelled -- jobs dropped before they started
+
+    The counters start from zero again whenever set_workers replaces the pool.
+    """
+    return _get_executor().stats()
+
+
+def _submit(func, *args):
+    return asyncio.wrap_future(_get_executor().submit(func, *args))
+
+
+async def render(map, image, scale_factor=1.0, offset_x=0, offset_y=0):
+    """Render map into image on the worker pool."""
+    await _submit(_render, map, image, scale_factor, offset_x, offset_y)
+
+
+def _render_to_bytes(map, format, scale_factor):
+    im = Image(map.width, map.height)
+    _render(map, im, scale_factor)
+    return im.to_string(format)
+
+
+async def render_to_bytes(map, format='png', scale_factor=1.0):
+    """Render map into a new Image and return it encoded with format."""
+    return await _submit(_render_to_bytes, map, format, scale_factor)
+
+
+async def encode(image, format='png', palette=None):
+    """Encode an Image or ImageView with format (and optional Palette)."""
+    if palette is None:
+        return await _submit(image.to_string, format)
+    return await _submit(image.to_string, format, palette)
@@ -0,0 +1,101 @@
+#
+# This file is part of Mapnik (c++ mapping toolkit)
+# Copyright (C) 2024 Artem Pavlenko
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+#
+
+"""Render many extents of a single Map on a pool of threads."""
+
+import copy
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from . import Image, render
+
+
+class RenderPool(object):
+    """Render a batch of extents of one Map on a pool of threads.
+
+    Every worker thread renders into its own copy of the Map. Copies share
+    the datasources, fonts and caches of the original Map, so only one set
+    of them exists per process. Rendering and encoding release the GIL,
+    which lets the workers use all cores.
+
+    Jobs are (Box2d, width, height, format) tuples. Results are yielded as
+    (job, encoded_bytes) pairs in the order the jobs complete.
+
+    >>> from mapnik import Box2d, Map, RenderPool, load_map
+    >>> m = Map(256, 256)
+    >>> load_map(m, 'mapfile.xml')
+    >>> jobs = [(Box2d(0, 0, 10, 10), 256, 256, 'png8')]
+    >>> with RenderPool(m, workers=8) as pool:
+    ...     for job, data in pool.render(jobs):
+    ...         pass
+    """
+
+    def __init__(self, map, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._map = map
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix='mapnik-render')
+
+    def _thread_map(self):
+        m = getattr(self._local, 'map', None)
+        if m is None:
+            m = copy.copy(self._map)
+            self._local.map = m
+        return m
+
+    def _render_job(self, job):
+        box, width, height, format = job
+        m = self._thread_map()
+        m.resize(width, height)
+        m.zoom_to_box(box)
+        im = Image(width, height)
+        render(m, im)
+        return im.to_string(format)
+
+    def render(self, jobs):
+        """Render an iterable of (Box2d, width, height, format) jobs.
+
+        Yields (job, encoded_bytes) as each job completes. At most twice as
+        many jobs as workers are queued at a time, so `jobs` may be a lazy
+        generator over a very large extent list.
+        """
+        limit = 2 * self.workers
+        pending = {}
+        for job in jobs:
+            pending[self._executor.submit(self._render_job, job)] = job
+            if len(pending) >= limit:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+
+    def close(self):
+        """Wait for running jobs and stop the worker threads."""
+        self._executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -78,6 +78,7 @@ ext_modules = [
                "src/mapnik_gamma_method.cpp",
                "src/mapnik_geometry.cpp",
                "src/mapnik_feature.cpp",
+               "src/mapnik_feature_batch.cpp",
                "src/mapnik_featureset.cpp",
                "src/mapnik_font_engine.cpp",
                "src/mapnik_fontset.cpp",
@@ -87,6 +88,7 @@ ext_modules = [
                "src/mapnik_image_view.cpp",
                "src/mapnik_projection.cpp",
                "src/mapnik_proj_transform.cpp",
+               "src/mapnik_view_transform.cpp",
                "src/mapnik_rule.cpp",
                "src/mapnik_symbolizer.cpp",
                "src/mapnik_debug_symbolizer.cpp",
@@ -33,8 +33,21 @@
 
 namespace py = pybind11;
 
+// Under MAPNIK_LAZY_PLUGINS the mapnik package only records the available plugins:
+// load the one of the requested type before creating the datasource
+inline void register_lazy_plugin(py::kwargs const& kwargs)
+{
+    if (!kwargs.contains("type")) return;
+    py::object package = py::module_::import("mapnik");
+    if (py::hasattr(package, "_register_plugin"))
+    {
+        package.attr("_register_plugin")(py::str(kwargs["type"]));
+    }
+}
+
 inline std::shared_ptr<mapnik::datasource> create_datasource(py::kwargs const& kwargs)
 {
+    register_lazy_plugin(kwargs);
     mapnik::parameters params;
     for (auto param : kwargs)
     {
@@ -29,7 +29,24 @@
 #include <mapnik/memory_datasource.hpp>
 #include "mapnik_value_converter.hpp"
 #include "create_datasource.hpp"
+#include "python_columns.hpp"
+#include "python_arrow.hpp"
+#include "python_memory_datasource.hpp"
+#include "python_filtered_featureset.hpp"
+#include "python_wkb.hpp"
+#include <mapnik/attribute_collector.hpp>
+#include <mapnik/expression.hpp>
+#include <mapnik/util/geometry_to_wkb.hpp>
+#include <mapnik/feature_factory.hpp>
+#include <mapnik/wkb.hpp>
 // stl
+#include <algorithm>
+#include <cerrno>
+#include <deque>
+#include <memory>
+#include <optional>
+#include <set>
+#include <sstream>
 #include <vector>
 //pybind11
 #include <pybind11/pybind11.h>
@@ -39,6 +56,7 @@
 
 using mapnik::datasource;
 using mapnik::memory_datasource;
+using mapnik::indexed_memory_datasource;
 using mapnik::layer_descriptor;
 using mapnik::attribute_descriptor;
 using mapnik::parameters;
@@ -123,6 +141,414 @@ py::dict parameters_impl(std::shared_ptr<mapnik::datasource> const& ds)
     return d;
 }
 
+py::dict to_columns(std::shared_ptr<mapnik::datasource> const& ds,
+                    mapnik::query const& query,
+                    std::optional<std::vector<std::string>> const& fields)
+{
+    mapnik::query q(query);
+    mapnik::exported_fields exported = mapnik::resolve_fields(ds->get_descriptor(), q, fields);
+    mapnik::feature_columns columns(exported.names);
+    {
+        py::gil_scoped_release release;
+        mapnik::featureset_ptr fs = ds->features(q);
+        if (fs) mapnik::read_columns(*fs, columns);
+    }
+    return mapnik::columns_to_python(columns, exported.types);
+}
+
+// Features of a query exported through the Arrow C stream interface: an int64 "fid"
+// column, a GeoArrow WKB "geometry" column and one column per field.
+struct arrow_feature_stream
+{
+    std::shared_ptr<datasource> ds; // keeps the featureset's datasource alive
+    mapnik::featureset_ptr fs;
+    std::vector<std::string> names;
+    std::vector<mapnik::arrow::column_type> types;
+    std::deque<mapnik::feature_ptr> peeked; // read ahead to infer untyped fields
+    std::size_t batch_size;
+    std::string last_error;
+};
+
+// Arrow type of a column, inferred as to_columns infers it from the declared type
+// and the values of the first batch
+mapnik::arrow::column_type arrow_type(unsigned declared_type, std::deque<mapnik::feature_ptr> const& features,
+                                      std::string const& name)
+{
+    using mapnik::arrow::column_type;
+    std::vector<mapnik::value> values;
+    values.reserve(features.size());
+    for (auto const& feature : features) values.push_back(feature->get(name));
+    switch (mapnik::infer_column_kind(values, declared_type))
+    {
+    case mapnik::column_kind::integer: return column_type::int64;
+    case mapnik::column_kind::floating: return column_type::float64;
+    case mapnik::column_kind::boolean: return column_type::boolean;
+    default: return column_type::utf8;
+    }
+}
+
+int arrow_stream_get_schema(ArrowArrayStream* stream, ArrowSchema* out)
+{
+    auto* self = static_cast<arrow_feature_stream*>(stream->private_data);
+    try
+    {
+        mapnik::arrow::init_schema(out, "+s", "", std::string(), 0);
+        mapnik::arrow::init_schema(mapnik::arrow::add_child(out), "l", "fid", std::string(), 0);
+        mapnik::arrow::init_schema(mapnik::arrow::add_child(out), "Z", "geometry",
+                                   mapnik::arrow::encode_metadata({{"ARROW:extension:name", "geoarrow.wkb"},
+                                                                   {"ARROW:extension:metadata", "{}"}}));
+        for (std::size_t i = 0; i < self->names.size(); ++i)
+        {
+            mapnik::arrow::init_schema(mapnik::arrow::add_child(out),
+                                       mapnik::arrow::format_string(self->types[i]), self->names[i]);
+        }
+    }
+    catch (std::exception const& ex)
+    {
+        if (out->release) out->release(out);
+        self->last_error = ex.what();
+        return EIO;
+    }
+    return 0;
+}
+
+int arrow_stream_get_next(ArrowArrayStream* stream, ArrowArray* out)
+{
+    using mapnik::arrow::column_builder;
+    using mapnik::arrow::column_type;
+    auto* self = static_cast<arrow_feature_stream*>(stream->private_data);
+    try
+    {
+        column_builder fid(column_type::int64);
+        column_builder geometry(column_type::binary);
+        std::vector<column_builder> fields;
+        for (auto type : self->types) fields.emplace_back(type);
+        std::size_t rows = 0;
+        while (rows < self->batch_size)
+        {
+            mapnik::feature_ptr feature;
+            if (!self->peeked.empty())
+            {
+                feature = std::move(self->peeked.front());
+                self->peeked.pop_front();
+            }
+            else if (self->fs)
+            {
+                feature = self->fs->next();
+            }
+            if (!feature)
+            {
+                self->fs.reset();
+                break;
+            }
+            fid.append_int64(feature->id());
+            mapnik::util::wkb_buffer_ptr wkb = mapnik::util::to_wkb(feature->get_geometry(), mapnik::wkbNDR);
+            if (wkb) geometry.append_bytes(wkb->buffer(), wkb->size());
+            else geometry.append_null();
+            for (std::size_t i = 0; i < fields.size(); ++i)
+            {
+                mapnik::value const& v = feature->get(self->names[i]);
+                if (!fields[i].append(v))
+                {
+                    // the schema is fixed once exported, the column cannot be widened anymore
+                    std::ostringstream s;
+                    s << "to_arrow: value '" << v.to_string() << "' of field '" << self->names[i]
+                      << "' in feature " << feature->id() << " does not fit the "
+                      << mapnik::arrow::format_string(self->types[i])
+                      << " column inferred from the first batch; use a larger batch_size";
+                    throw std::runtime_error(s.str());
+                }
+            }
+            ++rows;
+        }
+        if (rows == 0)
+        {
+            // end of stream
+            out->release = nullptr;
+            return 0;
+        }
+        std::vector<ArrowArray*> children;
+        children.push_back(new ArrowArray());
+        fid.finish(children.back());
+        children.push_back(new ArrowArray());
+        geometry.finish(children.back());
+        for (auto & field : fields)
+        {
+            children.push_back(new ArrowArray());
+            field.finish(children.back());
+        }
+        mapnik::arrow::init_struct_array(out, static_cast<std::int64_t>(rows), std::move(children));
+    }
+    catch (std::exception const& ex)
+    {
+        self->last_error = ex.what();
+        return EIO;
+    }
+    return 0;
+}
+
+char const* arrow_stream_get_last_error(ArrowArrayStream* stream)
+{
+    auto* self = static_cast<arrow_feature_stream*>(stream->private_data);
+    return self->last_error.empty() ? nullptr : self->last_error.c_str();
+}
+
+void arrow_stream_release(ArrowArrayStream* stream)
+{
+    delete static_cast<arrow_feature_stream*>(stream->private_data);
+    stream->release = nullptr;
+}
+
+void release_arrow_stream_capsule(PyObject* capsule)
+{
+    auto* stream = static_cast<ArrowArrayStream*>(PyCapsule_GetPointer(capsule, "arrow_array_stream"));
+    if (stream == nullptr) return;
+    if (stream->release) stream->release(stream);
+    delete stream;
+}
+
+// Python object handed out by Datasource.to_arrow, consumable once
+struct arrow_stream_holder
+{
+    std::unique_ptr<arrow_feature_stream> stream;
+
+    py::capsule export_stream(py::object const& /*requested_schema*/)
+    {
+        if (!stream)
+        {
+            throw std::runtime_error("Arrow stream has already been consumed");
+        }
+        auto* out = new ArrowArrayStream();
+        out->get_schema = &arrow_stream_get_schema;
+        out->get_next = &arrow_stream_get_next;
+        out->get_last_error = &arrow_stream_get_last_error;
+        out->release = &arrow_stream_release;
+        out->private_data = stream.release();
+        return py::capsule(out, "arrow_array_stream", &release_arrow_stream_capsule);
+    }
+};
+
+arrow_stream_holder to_arrow(std::shared_ptr<mapnik::datasource> const& ds,
+                             mapnik::query const& query,
+                             std::optional<std::vector<std::string>> const& fields,
+                             std::size_t batch_size)
+{
+    if (batch_size == 0)
+    {
+        throw std::runtime_error("to_arrow: batch_size must be greater than zero");
+    }
+    auto stream = std::make_unique<arrow_feature_stream>();
+    stream->ds = ds;
+    stream->batch_size = batch_size;
+    mapnik::query q(query);
+    mapnik::exported_fields exported = mapnik::resolve_fields(ds->get_descriptor(), q, fields);
+    stream->names = exported.names;
+    {
+        py::gil_scoped_release release;
+        stream->fs = ds->features(q);
+        // read the first batch ahead to type fields the descriptor does not know
+        while (stream->fs && stream->peeked.size() < batch_size)
+        {
+            mapnik::feature_ptr feature = stream->fs->next();
+            if (!feature) break;
+            stream->peeked.push_back(std::move(feature));
+        }
+        for (std::size_t i = 0; i < stream->names.size(); ++i)
+        {
+            stream->types.push_back(arrow_type(exported.types[i], stream->peeked, stream->names[i]));
+        }
+    }
+    arrow_stream_holder holder;
+    holder.stream = std::move(stream);
+    return holder;
+}
+
+mapnik::featureset_ptr iter_features(std::shared_ptr<mapnik::datasource> const& ds,
+                                     std::optional<mapnik::box2d<double>> const& bbox,
+                                     std::optional<std::vector<std::string>> const& fields,
+                                     std::optional<std::size_t> const& limit,
+                                     mapnik::expression_ptr const& filter)
+{
+    if (limit && *limit == 0) return mapnik::make_invalid_featureset();
+    mapnik::query q(bbox ? *bbox : ds->envelope());
+    if (fields)
+    {
+        for (auto const& name : *fields) q.add_property_name(name);
+    }
+    else
+    {
+        for (auto const& desc : ds->get_descriptor().get_descriptors()) q.add_property_name(desc.get_name());
+    }
+    if (filter)
+    {
+        // the plugin must also return the attributes the filter refers to
+        std::set<std::string> names;
+        mapnik::expression_attributes<std::set<std::string>> collector(names);
+        mapnik::util::apply_visitor(collector, *filter);
+        for (auto const& name : names) q.add_property_name(name);
+    }
+    mapnik::featureset_ptr fs;
+    {
+        py::gil_scoped_release release;
+        fs = ds->features(q);
+    }
+    if (!filter && !limit) return fs;
+    return std::make_shared<mapnik::filtered_featureset>(fs, filter, mapnik::attributes(), limit ? *limit : 0);
+}
+
+// shared context and converted values of the attribute columns of a bulk load
+struct attribute_columns
+{
+    attribute_columns(py::handle const& columns, std::size_t size)
+        : context(std::make_shared<mapnik::context_type>())
+    {
+        if (columns.is_none()) return;
+        if (!py::isinstance(columns, py::module_::import("collections.abc").attr("Mapping")))
+        {
+            throw py::type_error("attributes must be a mapping of field names to columns, not "
+                                 + std::string(py::str(py::type::handle_of(columns).attr("__name__"))));
+        }
+        for (auto item : columns.attr("items")())
+        {
+            py::tuple pair = py::reinterpret_borrow<py::tuple>(item);
+            std::string name = py::str(pair[0]);
+            context->push(name);
+            names.push_back(name);
+            values.push_back(mapnik::values_from_python(pair[1], size, name));
+        }
+    }
+
+    mapnik::feature_ptr create(std::size_t index) const
+    {
+        mapnik::feature_ptr feature = mapnik::feature_factory::create(context, static_cast<mapnik::value_integer>(index + 1));
+        for (std::size_t i = 0; i < names.size(); ++i)
+        {
+            feature->put(names[i], values[i][index]);
+        }
+        return feature;
+    }
+
+    mapnik::context_ptr context;
+    std::vector<std::string> names;
+    std::vector<std::vector<mapnik::value>> values;
+};
+
+std::shared_ptr<indexed_memory_datasource> memory_datasource_from_arrays(
+    py::array_t<double, py::array::c_style | py::array::forcecast> const& x,
+    py::array_t<double, py::array::c_style | py::array::forcecast> const& y,
+    py::kwargs const& columns)
+{
+    if (x.ndim() != 1 || y.ndim() != 1 || x.size() != y.size())
+    {
+        throw std::runtime_error("from_arrays: x and y must be one dimensional arrays of the same length");
+    }
+    std::size_t size = static_cast<std::size_t>(x.size());
+    attribute_columns attributes(columns, size);
+    auto ds = mapnik::make_memory_datasource();
+    double const* xs = x.data();
+    double const* ys = y.data();
+    {
+        py::gil_scoped_release release;
+        std::vector<mapnik::feature_ptr> features;
+        features.reserve(size);
+        for (std::size_t i = 0; i < size; ++i)
+        {
+            mapnik::feature_ptr feature = attributes.create(i);
+            feature->set_geometry(mapnik::geometry::point<double>(xs[i], ys[i]));
+            features.push_back(std::move(feature));
+        }
+        ds->add_features(features);
+    }
+    return ds;
+}
+
+std::shared_ptr<indexed_memory_datasource> memory_datasource_from_wkb(py::object const& geometries,
+                                                                      py::object const& attributes,
+                                                                      py::object const& offsets)
+{
+    // (pointer, size) of each WKB, kept valid by `owners` while the GIL is released
+    std::vector<std::pair<char const*, std::size_t>> wkbs;
+    std::vector<py::object> owners;
+    if (!offsets.is_none())
+    {
+        py::buffer_info data = py::reinterpret_borrow<py::buffer>(geometries).request();
+        // offsets address bytes: the buffer must be one C-contiguous block
+        py::ssize_t stride = data.itemsize;
+        for (py::ssize_t d = data.ndim; d-- > 0;)
+        {
+            if (data.shape[d] != 1 && data.strides[d] != stride)
+            {
+                throw std::runtime_error("from_wkb: the geometry buffer must be C-contiguous when offsets are given");
+            }
+            stride *= data.shape[d];
+        }
+        auto offs = py::array_t<std::int64_t, py::array::c_style | py::array::forcecast>::ensure(offsets);
+        if (!offs) throw py::error_already_set();
+        if (offs.ndim() != 1 || offs.size() < 1)
+        {
+            throw std::runtime_error("from_wkb: offsets must be a one dimensional array of N + 1 offsets");
+        }
+        std::int64_t total = static_cast<std::int64_t>(data.size * data.itemsize);
+        std::int64_t const* o = offs.data();
+        for (py::ssize_t i = 0; i + 1 < offs.size(); ++i)
+        {
+            if (o[i] < 0 || o[i] > o[i + 1] || o[i + 1] > total)
+            {
+                std::ostringstream s;
+                s << "from_wkb: invalid offsets at index " << i;
+                throw std::runtime_error(s.str());
+            }
+            wkbs.emplace_back(static_cast<char const*>(data.ptr) + o[i], static_cast<std::size_t>(o[i + 1] - o[i]));
+        }
+        owners.push_back(geometries);
+        owners.push_back(offs);
+    }
+    else
+    {
+        for (auto item : geometries)
+        {
+            if (item.is_none())
+            {
+                wkbs.emplace_back(nullptr, 0);
+                continue;
+            }
+            // no copy for bytes, any other buffer is copied once
+            py::object bytes = py::reinterpret_steal<py::object>(PyBytes_FromObject(item.ptr()));
+            if (!bytes) throw py::error_already_set();
+            char* buffer = nullptr;
+            py::ssize_t length = 0;
+            PyBytes_AsStringAndSize(bytes.ptr(), &buffer, &length);
+            wkbs.emplace_back(buffer, static_cast<std::size_t>(length));
+            owners.push_back(std::move(bytes));
+        }
+    }
+    attribute_columns attrs(attributes, wkbs.size());
+    auto ds = mapnik::make_memory_datasource();
+    {
+        py::gil_scoped_release release;
+        std::vector<mapnik::feature_ptr> features;
+        features.reserve(wkbs.size());
+        for (std::size_t i = 0; i < wkbs.size(); ++i)
+        {
+            mapnik::feature_ptr feature = attrs.create(i);
+            if (wkbs[i].first != nullptr)
+            {
+                mapnik::geometry::geometry<double> geom;
+                if (!mapnik::parse_wkb(wkbs[i].first, wkbs[i].second, geom))
+                {
+                    std::ostringstream s;
+                    s << "Failed to parse WKB at index " << i;
+                    throw std::runtime_error(s.str());
+                }
+                feature->set_geometry(std::move(geom));
+            }
+            features.push_back(std::move(feature));
+        }
+        ds->add_features(features);
+    }
+    return ds;
+}
+
 } // namespace
 
 
@@ -155,6 +581,49 @@ void export_datasource(py::module& m)
         .def("parameters", &parameters_impl,
              "The configuration parameters of the data source. "
              "These vary depending on the type of data source.")
+        .def("to_columns", &to_columns,
+             "Read all features matching a query into NumPy arrays.\n"
+             "Returns a dict with 'id' (int64), 'envelope' (float64, N x 4),\n"
+             "'wkb' (bytes objects) and 'fields', a dict of one array per field.\n"
+             "Integer, float and boolean fields become int64, float64 and bool\n"
+             "arrays (missing floats are NaN); strings, nullable integers or\n"
+             "booleans and mixed fields become object arrays.\n"
+             "Fields default to the query property names, or all fields.\n"
+             "\n"
+             "Usage:\n"
+             ">>> ds = Shapefile(file='world.shp')\n"
+             ">>> cols = ds.to_columns(Query(ds.envelope()), fields=['POP2005'])\n"
+             ">>> cols['fields']['POP2005'].sum()\n",
+             py::arg("query"), py::arg("fields") = py::none())
+        .def("to_arrow", &to_arrow,
+             "Stream the features matching a query as Arrow record batches.\n"
+             "The returned object implements the Arrow PyCapsule interface\n"
+             "(__arrow_c_stream__) and can be consumed once by pyarrow, polars,\n"
+             "duckdb and others. Columns are 'fid' (int64), 'geometry'\n"
+             "(GeoArrow WKB) and one column per field. Batches are built in C++\n"
+             "without holding the GIL.\n"
+             "Fields are typed as by to_columns, from the layer descriptor and the\n"
+             "values of the first batch. A later value that does not fit its column\n"
+             "ends the stream with an error.\n"
+             "\n"
+             "Usage:\n"
+             ">>> import pyarrow as pa\n"
+             ">>> ds = Shapefile(file='world.shp')\n"
+             ">>> table = pa.table(ds.to_arrow(Query(ds.envelope())))\n",
+             py::arg("query"), py::arg("fields") = py::none(), py::arg("batch_size") = 65536)
+        .def("iter_features", &iter_features,
+             "Iterate the features in bbox (default: the whole extent) requesting\n"
+             "only the given fields from the plugin (default: all fields).\n"
+             "An optional filter Expression is evaluated natively and iteration\n"
+             "stops after limit matching features.\n"
+             "\n"
+             "Usage:\n"
+             ">>> ds = Shapefile(file='world.shp')\n"
+             ">>> for f in ds.iter_features(fields=['NAME'], filter=Expression('[POP2005] > 1e8'), limit=5):\n"
+             "...     print(f['NAME'])\n",
+             py::arg("bbox") = py::none(), py::arg("fields") = py::none(),
+             py::arg("limit") = py::none(), py::arg("filter") = py::none(),
+             py::keep_alive<0, 1>())
         .def(py::self == py::self)
         .def("__iter__",
              [](datasource const& ds) {
@@ -172,19 +641,44 @@ void export_datasource(py::module& m)
 
     m.def("CreateDatasource",&create_datasource);
 
-    py::class_<memory_datasource, datasource, std::shared_ptr<memory_datasource>>
+    py::class_<arrow_stream_holder>(m, "ArrowStream",
+                                    "Arrow C stream of features, see Datasource.to_arrow")
+        .def("__arrow_c_stream__", &arrow_stream_holder::export_stream,
+             py::arg("requested_schema") = py::none())
+        ;
+
+    py::class_<indexed_memory_datasource, datasource, std::shared_ptr<indexed_memory_datasource>>
         (m, "MemoryDatasource")
-        .def(py::init([]() {
-            mapnik::parameters p;
-            p.insert(std::make_pair("type","memory"));
-            return std::make_shared<memory_datasource>(p);}))
-        .def("add_feature", &memory_datasource::push,
+        .def(py::init(&mapnik::make_memory_datasource))
+        .def_static("from_arrays", &memory_datasource_from_arrays,
+                    "Create a MemoryDatasource of points from coordinate arrays and\n"
+                    "keyword attribute columns of the same length, in one call.\n"
+                    "Features get ids 1..N and the envelope is computed up front.\n"
+                    "\n"
+                    "Usage:\n"
+                    ">>> ds = MemoryDatasource.from_arrays(xs, ys, name=names, population=pops)\n",
+                    py::arg("x"), py::arg("y"))
+        .def_static("from_wkb", &memory_datasource_from_wkb,
+                    "Create a MemoryDatasource from WKB geometries and a dict of\n"
+                    "attribute columns, in one call. geometries is a sequence of\n"
+                    "bytes (None for no geometry), or with offsets a single buffer\n"
+                    "where geometry i spans offsets[i]:offsets[i + 1].\n"
+                    "\n"
+                    "Usage:\n"
+                    ">>> ds = MemoryDatasource.from_wkb(wkbs, {'name': names})\n",
+                    py::arg("geometries"), py::arg("attributes") = py::none(), py::arg("offsets") = py::none())
+        .def("add_feature", &indexed_memory_datasource::add_feature,
              "Adds a Feature:\n"
              ">>> ms = MemoryDatasource()\n"
              ">>> feature = Feature(Context(),1)\n"
              ">>> ms.add_feature(f)\n")
         .def("num_features", &memory_datasource::size)
+        .def("build_index", &indexed_memory_datasource::build_index,
+             "Bulk load the spatial index used by features() and features_at_point().\n"
+             "Otherwise it is built by the first query after features were added.\n",
+             py::call_guard<py::gil_scoped_release>())
+        .def("has_index", &indexed_memory_datasource::has_index)
         ;
 
-    py::implicitly_convertible<memory_datasource, datasource>();
+    py::implicitly_convertible<indexed_memory_datasource, datasource>();
 }
@@ -40,6 +40,11 @@ bool register_datasources(std::string const& plugins_dir, bool recursive = false
     return mapnik::datasource_cache::instance().register_datasources(plugins_dir, recursive);
 }
 
+bool register_datasource(std::string const& plugin_path)
+{
+    return mapnik::datasource_cache::instance().register_datasource(plugin_path);
+}
+
 std::string plugin_directories()
 {
     return mapnik::datasource_cache::instance().plugin_directories();
@@ -58,6 +63,10 @@ void export_datasource_cache(py::module const& m)
     py::class_<mapnik::datasource_cache, std::unique_ptr<mapnik::datasource_cache, py::nodelete>>(m, "DatasourceCache")
         .def_static("create",&create_datasource)
         .def_static("register_datasources",&register_datasources)
+        .def_static("register_datasource",&register_datasource,
+                    "Register a single input plugin from its *.input file.\n"
+                    "Returns True if a new datasource type was registered.\n",
+                    py::arg("path"))
         .def_static("plugin_names",&plugin_names)
         .def_static("plugin_directories",&plugin_directories)
         ;
@@ -24,7 +24,9 @@
 #include <mapnik/config.hpp>
 #include "python_to_value.hpp"
 #include "mapnik_value_converter.hpp"
+#include "python_filtered_featureset.hpp"
 #include <mapnik/util/variant.hpp>
+#include <mapnik/datasource.hpp>
 #include <mapnik/feature.hpp>
 #include <mapnik/expression.hpp>
 #include <mapnik/expression_string.hpp>
@@ -32,6 +34,9 @@
 #include <mapnik/parse_path.hpp>
 #include <mapnik/value.hpp>
 
+// stl
+#include <memory>
+#include <vector>
 //pybind11
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
@@ -70,6 +75,32 @@ bool expression_evaluate_to_bool_(mapnik::expr_node const& expr, mapnik::feature
                                        mapnik::value,mapnik::attributes>(f, mapnik::dict2attr(d)),expr).to_bool();
 }
 
+// filter and evaluate a whole featureset, converting the variables only once
+mapnik::featureset_ptr expression_filter_(mapnik::expression_ptr const& expr, mapnik::featureset_ptr const& fs, py::dict const& d)
+{
+    return std::make_shared<mapnik::filtered_featureset>(fs, expr, mapnik::dict2attr(d));
+}
+
+py::list expression_evaluate_many_(mapnik::expr_node const& expr, mapnik::featureset_ptr const& fs, py::dict const& d)
+{
+    mapnik::attributes vars = mapnik::dict2attr(d);
+    std::vector<mapnik::value> values;
+    {
+        py::gil_scoped_release release;
+        while (mapnik::feature_ptr feature = fs ? fs->next() : mapnik::feature_ptr())
+        {
+            values.push_back(mapnik::util::apply_visitor(mapnik::evaluate<mapnik::feature_impl,
+                                                         mapnik::value,mapnik::attributes>(*feature, vars),expr));
+        }
+    }
+    py::list result;
+    for (auto const& value : values)
+    {
+        result.append(py::cast(value));
+    }
+    return result;
+}
+
 // path expression
 path_expression_ptr parse_path_(std::string const& path)
 {
@@ -92,6 +123,22 @@ void export_expression(py::module const& m)
         .def(py::init([] (std::string const& wkt) { return parse_expression_(wkt);}))
         .def("evaluate", &expression_evaluate_, py::arg("feature"), py::arg("variables") = py::dict())
         .def("to_bool", &expression_evaluate_to_bool_, py::arg("feature"), py::arg("variables") = py::dict())
+        .def("filter", &expression_filter_,
+             "Featureset of the features of featureset for which the expression is true.\n"
+             "Evaluation happens in C++ as the result is iterated.\n"
+             "\n"
+             "Usage:\n"
+             ">>> expr = Expression('[POP2005] > @threshold')\n"
+             ">>> big = list(expr.filter(ds.features(Query(ds.envelope())), {'threshold': 1e8}))\n",
+             py::arg("featureset"), py::arg("variables") = py::dict(),
+             py::keep_alive<0, 2>())
+        .def("evaluate_many", &expression_evaluate_many_,
+             "List of the values of the expression for every feature of featureset,\n"
+             "evaluated in C++ with the GIL released.\n"
+             "\n"
+             "Usage:\n"
+             ">>> Expression('[POP2005] / 1000').evaluate_many(ds.features(Query(ds.envelope())))\n",
+             py::arg("featureset"), py::arg("variables") = py::dict())
         .def("__str__", &expression_to_string_);
     ;
 
@@ -84,6 +84,37 @@ void __setitem__(mapnik::feature_impl & feature, std::string const& name, mapnik
     feature.put_new(name,val);
 }
 
+std::size_t field_index(context_type const& ctx, std::string const& name)
+{
+    for (auto const& item : ctx)
+    {
+        if (item.first == name) return item.second;
+    }
+    throw py::key_error("No field named '" + name + "' in context");
+}
+
+mapnik::value get_by_index(mapnik::feature_impl & feature, std::size_t index)
+{
+    if (index >= feature.context()->size())
+    {
+        throw py::index_error("Field index out of range");
+    }
+    return feature.get(index);
+}
+
+// all attribute values in context order, None for the ones never set
+py::tuple values(mapnik::feature_impl & feature)
+{
+    std::size_t size = feature.context()->size();
+    auto const& data = feature.get_data();
+    py::tuple result(size);
+    for (std::size_t i = 0; i < size; ++i)
+    {
+        result[i] = i < data.size() ? py::cast(data[i]) : py::none();
+    }
+    return result;
+}
+
 py::dict attributes(mapnik::feature_impl const& feature)
 {
     auto attributes = py::dict();
@@ -101,6 +132,12 @@ void export_feature(py::module const& m)
     py::class_<context_type, context_ptr>(m, "Context")
         .def(py::init<>(), "Default constructor")
         .def("push", &context_type::push)
+        .def("field_index", &field_index,
+             "Index of a field, for Feature.get_by_index:\n"
+             ">>> i = ctx.field_index('name')\n"
+             ">>> names = [f.get_by_index(i) for f in featureset]\n",
+             py::arg("name"))
+        .def("__len__", &context_type::size)
         ;
 
     py::class_<mapnik::feature_impl, std::shared_ptr<mapnik::feature_impl>>(m, "Feature")
@@ -119,6 +156,12 @@ void export_feature(py::module const& m)
         .def("__getitem__", &__getitem__)
         .def("__getitem__", &__getitem2__)
         .def("__len__", &mapnik::feature_impl::size)
+        .def("get_by_index", &get_by_index,
+             "Value of the field at the given context index, see Context.field_index.\n"
+             "Avoids the name lookup of feature[name] in hot loops.\n",
+             py::arg("index"))
+        .def("values", &values,
+             "Tuple of all attribute values in context order.\n")
         .def("context", &mapnik::feature_impl::context)
         .def("to_json", &feature_to_geojson)
         .def("to_geojson", &feature_to_geojson)
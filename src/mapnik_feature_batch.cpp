@@ -0,0 +1,198 @@
+/*****************************************************************************
+ *
+ * This file is part of Mapnik (c++ mapping toolkit)
+ *
+ * Copyright (C) 2024 Artem Pavlenko
+ *
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation; either
+ * version 2.1 of the License, or (at your option) any later version.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this library; if not, write to the Free Software
+ * Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+ *
+ *****************************************************************************/
+
+// mapnik
+#include <mapnik/config.hpp>
+#include <mapnik/feature.hpp>
+#include <mapnik/feature_factory.hpp>
+#include <mapnik/geometry.hpp>
+#include <mapnik/unicode.hpp>
+#include <mapnik/value.hpp>
+#include "mapnik_value_converter.hpp"
+#include "python_to_value.hpp"
+#include "python_memory_datasource.hpp"
+#include "python_geojson_writer.hpp"
+//stl
+#include <memory>
+#include <optional>
+#include <sstream>
+#include <stdexcept>
+#include <string>
+#include <vector>
+//pybind11
+#include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
+
+namespace py = pybind11;
+
+namespace {
+
+using mapnik::context_ptr;
+using mapnik::value;
+
+// Features sharing one context, stored as a row-major value table plus one
+// geometry and id per row, without a feature_impl per row.
+class feature_batch
+{
+  public:
+    explicit feature_batch(std::vector<std::string> const& fields)
+        : ctx_(std::make_shared<mapnik::context_type>()),
+          fields_(fields),
+          tr_("utf8")
+    {
+        for (auto const& name : fields_) ctx_->push(name);
+    }
+
+    std::size_t size() const { return ids_.size(); }
+
+    context_ptr context() const { return ctx_; }
+
+    std::vector<std::string> const& fields() const { return fields_; }
+
+    // values is a sequence in field order (missing trailing values are null) or a dict
+    void append(py::object const& geometry, py::object const& values, std::optional<mapnik::value_integer> const& id)
+    {
+        std::size_t width = fields_.size();
+        std::vector<value> row(width);
+        if (py::isinstance<py::dict>(values))
+        {
+            for (auto item : py::reinterpret_borrow<py::dict>(values))
+            {
+                row[field_index(py::str(item.first))] = mapnik::python_to_value(item.second, tr_);
+            }
+        }
+        else if (!values.is_none())
+        {
+            std::size_t i = 0;
+            for (auto item : values)
+            {
+                if (i == width)
+                {
+                    std::ostringstream s;
+                    s << "FeatureBatch.append: more values than the " << width << " fields";
+                    throw std::runtime_error(s.str());
+                }
+                row[i++] = mapnik::python_to_value(item, tr_);
+            }
+        }
+        mapnik::geometry::geometry<double> geom;
+        if (!geometry.is_none()) geom = geometry.cast<mapnik::geometry::geometry<double> const&>();
+        ids_.push_back(id ? *id : static_cast<mapnik::value_integer>(ids_.size() + 1));
+        geometries_.push_back(std::move(geom));
+        values_.insert(values_.end(), std::make_move_iterator(row.begin()), std::make_move_iterator(row.end()));
+    }
+
+    mapnik::feature_ptr feature(std::size_t row) const
+    {
+        mapnik::feature_ptr feature = mapnik::feature_factory::create(ctx_, ids_[row]);
+        feature->set_geometry_copy(geometries_[row]);
+        value const* values = values_.data() + row * fields_.size();
+        for (std::size_t i = 0; i < fields_.size(); ++i)
+        {
+            if (!values[i].is_null()) feature->put(fields_[i], values[i]);
+        }
+        return feature;
+    }
+
+    mapnik::feature_ptr getitem(std::ptrdiff_t row) const
+    {
+        std::ptrdiff_t size = static_cast<std::ptrdiff_t>(this->size());
+        if (row < 0) row += size;
+        if (row < 0 || row >= size) throw py::index_error("FeatureBatch index out of range");
+        return feature(static_cast<std::size_t>(row));
+    }
+
+    // The features are built while the GIL is held: append() may otherwise grow
+    // the tables from another thread while they are read.
+    std::vector<mapnik::feature_ptr> features() const
+    {
+        std::vector<mapnik::feature_ptr> result;
+        result.reserve(size());
+        for (std::size_t row = 0; row < size(); ++row) result.push_back(feature(row));
+        return result;
+    }
+
+    std::shared_ptr<mapnik::indexed_memory_datasource> to_datasource() const
+    {
+        auto ds = mapnik::make_memory_datasource();
+        std::vector<mapnik::feature_ptr> features = this->features();
+        py::gil_scoped_release release;
+        ds->add_features(features);
+        return ds;
+    }
+
+    std::string to_geojson() const
+    {
+        std::vector<mapnik::feature_ptr> features = this->features();
+        py::gil_scoped_release release;
+        std::string json;
+        mapnik::geojson_collection_writer writer(json);
+        for (auto const& feature : features) writer.add(*feature);
+        writer.close();
+        return json;
+    }
+
+  private:
+    std::size_t field_index(std::string const& name) const
+    {
+        for (std::size_t i = 0; i < fields_.size(); ++i)
+        {
+            if (fields_[i] == name) return i;
+        }
+        throw py::key_error("No field named '" + name + "' in FeatureBatch");
+    }
+
+    context_ptr ctx_;
+    std::vector<std::string> fields_;
+    std::vector<mapnik::value_integer> ids_;
+    std::vector<mapnik::geometry::geometry<double>> geometries_;
+    std::vector<value> values_; // size() rows of fields_.size() values
+    mapnik::transcoder tr_;
+};
+
+} // namespace
+
+void export_feature_batch(py::module const& m)
+{
+    py::class_<feature_batch, std::shared_ptr<feature_batch>>(m, "FeatureBatch",
+        "Compact table of features sharing one Context.\n"
+        "\n"
+        "Usage:\n"
+        ">>> batch = FeatureBatch(['name', 'pop'])\n"
+        ">>> batch.append(Geometry.from_wkt('POINT(1 2)'), ['a', 10])\n"
+        ">>> batch.append(Geometry.from_wkt('POINT(3 4)'), {'name': 'b'})\n"
+        ">>> ds = batch.to_datasource()\n")
+        .def(py::init<std::vector<std::string> const&>(), py::arg("fields"))
+        .def("append", &feature_batch::append,
+             "Append a feature with an optional Geometry and its values, either in\n"
+             "field order or as a dict. The id defaults to the row number + 1.\n",
+             py::arg("geometry"), py::arg("values") = py::none(), py::arg("id") = py::none())
+        .def("__len__", &feature_batch::size)
+        .def("__getitem__", &feature_batch::getitem)
+        .def_property_readonly("context", &feature_batch::context)
+        .def_property_readonly("fields", &feature_batch::fields)
+        .def("to_datasource", &feature_batch::to_datasource,
+             "Build a MemoryDatasource holding the features of the batch.\n")
+        .def("to_geojson", &feature_batch::to_geojson,
+             "Serialise the batch as a GeoJSON FeatureCollection.\n")
+        ;
+}
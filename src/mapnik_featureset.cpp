@@ -24,6 +24,12 @@
 #include <mapnik/config.hpp>
 #include <mapnik/feature.hpp>
 #include <mapnik/datasource.hpp>
+#include "python_columns.hpp"
+#include "python_geojson_writer.hpp"
+//stl
+#include <fstream>
+#include <stdexcept>
+#include <string>
 
 //pybind11
 #include <pybind11/pybind11.h>
@@ -41,14 +47,107 @@ inline mapnik::feature_ptr next(mapnik::featureset_ptr const& itr)
     return f;
 }
 
+py::object read_batch(mapnik::Featureset & fs, std::size_t size)
+{
+    if (size == 0)
+    {
+        throw std::runtime_error("read_batch: size must be greater than zero");
+    }
+    mapnik::feature_columns columns;
+    {
+        py::gil_scoped_release release;
+        mapnik::read_columns(fs, columns, size);
+    }
+    if (columns.size() == 0) return py::none();
+    return mapnik::columns_to_python(columns);
+}
+
+// reads features into the writer until chunk_size bytes are buffered, false once exhausted
+bool fill_geojson_chunk(mapnik::Featureset & fs, mapnik::geojson_collection_writer & writer,
+                        std::string const& buffer, std::size_t chunk_size)
+{
+    while (buffer.size() < chunk_size)
+    {
+        mapnik::feature_ptr feature = fs.next();
+        if (!feature) return false;
+        writer.add(*feature);
+    }
+    return true;
+}
+
+std::size_t write_geojson(mapnik::featureset_ptr const& fs, py::object const& file, std::size_t chunk_size)
+{
+    if (!fs) throw std::runtime_error("write_geojson: invalid featureset");
+    if (chunk_size == 0) throw std::runtime_error("write_geojson: chunk_size must be greater than zero");
+    std::string buffer;
+    buffer.reserve(chunk_size + chunk_size / 4);
+    if (py::isinstance<py::str>(file) || py::hasattr(file, "__fspath__"))
+    {
+        // a path: write straight from C++ without taking the GIL back
+        std::string path = py::str(py::module_::import("os").attr("fspath")(file));
+        py::gil_scoped_release release;
+        std::ofstream out(path, std::ios::out | std::ios::trunc | std::ios::binary);
+        if (!out) throw std::runtime_error("write_geojson: could not open " + path);
+        mapnik::geojson_collection_writer writer(buffer);
+        bool more = true;
+        while (more)
+        {
+            more = fill_geojson_chunk(*fs, writer, buffer, chunk_size);
+            if (!more) writer.close();
+            out.write(buffer.data(), static_cast<std::streamsize>(buffer.size()));
+            buffer.clear();
+        }
+        if (!out) throw std::runtime_error("write_geojson: could not write " + path);
+        return writer.count();
+    }
+    py::object write = file.attr("write");
+    bool text = py::isinstance(file, py::module_::import("io").attr("TextIOBase"));
+    mapnik::geojson_collection_writer writer(buffer);
+    bool more = true;
+    while (more)
+    {
+        {
+            py::gil_scoped_release release;
+            more = fill_geojson_chunk(*fs, writer, buffer, chunk_size);
+            if (!more) writer.close();
+        }
+        if (text) write(py::str(buffer));
+        else write(py::bytes(buffer));
+        buffer.clear();
+    }
+    return writer.count();
 }
 
-void export_featureset(py::module const& m)
+}
+
+void export_featureset(py::module& m) // non-const because of m.def(..)
 {
     // Featureset implements Python iterator interface
     py::class_<mapnik::Featureset, std::shared_ptr<mapnik::Featureset>>
         (m, "Featureset")
         .def("__iter__", [](mapnik::Featureset& itr) -> mapnik::Featureset& { return itr; })
         .def("__next__", next)
+        .def("read_batch", &read_batch,
+             "Read up to size features into NumPy arrays, see Datasource.to_columns.\n"
+             "Fields are taken from the first feature of the batch.\n"
+             "Returns None once the featureset is exhausted.\n"
+             "\n"
+             "Usage:\n"
+             ">>> fs = ds.features(Query(ds.envelope()))\n"
+             ">>> while (batch := fs.read_batch(65536)) is not None:\n"
+             "...     total += len(batch['id'])\n",
+             py::arg("size"))
         ;
+
+    m.def("write_geojson", &write_geojson,
+          "Write all features of a featureset as a GeoJSON FeatureCollection to\n"
+          "a path or a file object. Features are serialised in C++ into chunks\n"
+          "of about chunk_size bytes, with the GIL released while each chunk is\n"
+          "built, so memory use does not grow with the number of features.\n"
+          "Returns the number of features written.\n"
+          "\n"
+          "Usage:\n"
+          ">>> with open('out.geojson', 'wb') as f:\n"
+          "...     write_geojson(ds.features(Query(ds.envelope())), f)\n",
+          py::arg("featureset"), py::arg("file"), py::arg("chunk_size") = 65536);
 }
@@ -23,18 +23,161 @@
 //mapnik
 #include <mapnik/config.hpp>
 #include <mapnik/font_engine_freetype.hpp>
+//stl
+#include <charconv>
+#include <cstdint>
+#include <cstdio>
+#include <filesystem>
+#include <fstream>
+#include <map>
+#include <random>
+#include <set>
+#include <sstream>
+#include <stdexcept>
+#include <string>
+#include <vector>
 //pybind11
 #include <pybind11/pybind11.h>
+#include <pybind11/stl.h>
 
 namespace py = pybind11;
 
-void export_font_engine(py::module const& m)
+namespace {
+
+using mapnik::freetype_engine;
+using mapnik::font_file_mapping_type;
+
+char const* const font_index_header = "# mapnik font index 1";
+
+// size and modification time identify an unchanged font file
+bool font_file_signature(std::string const& file, std::string & signature)
+{
+    std::error_code ec;
+    std::filesystem::path path(file);
+    auto size = std::filesystem::file_size(path, ec);
+    if (ec) return false;
+    auto mtime = std::filesystem::last_write_time(path, ec);
+    if (ec) return false;
+    signature = std::to_string(size) + '\t' + std::to_string(mtime.time_since_epoch().count());
+    return true;
+}
+
+// face_name <tab> index <tab> file <tab> size <tab> mtime
+// Font files listed in `files` without any registered face are recorded with an
+// empty face name and index -1, so they are not probed again.
+void save_index(std::string const& filename, std::vector<std::string> const& files)
 {
-    using mapnik::freetype_engine;
+    std::ostringstream s;
+    s << font_index_header << '\n';
+    std::set<std::string> indexed;
+    for (auto const& kv : freetype_engine::get_mapping())
+    {
+        std::string signature;
+        if (!font_file_signature(kv.second.second, signature)) continue;
+        s << kv.first << '\t' << kv.second.first << '\t' << kv.second.second << '\t' << signature << '\n';
+        indexed.insert(kv.second.second);
+    }
+    for (auto const& file : files)
+    {
+        std::string signature;
+        if (indexed.count(file) > 0 || !font_file_signature(file, signature)) continue;
+        s << '\t' << -1 << '\t' << file << '\t' << signature << '\n';
+        indexed.insert(file);
+    }
+    // write to a temporary file first so concurrent readers never see a partial index
+    std::string tmp = filename + "." + std::to_string(std::random_device()()) + ".tmp";
+    {
+        std::ofstream out(tmp, std::ios::out | std::ios::trunc | std::ios::binary);
+        if (!out)
+        {
+            throw std::runtime_error("Could not open font index for writing: " + filename);
+        }
+        out << s.str();
+    }
+    if (std::rename(tmp.c_str(), filename.c_str()) != 0)
+    {
+        std::remove(tmp.c_str());
+        throw std::runtime_error("Could not write font index: " + filename);
+    }
+}
+
+std::vector<std::string> load_index(std::string const& filename)
+{
+    std::ifstream in(filename, std::ios::in | std::ios::binary);
+    if (!in)
+    {
+        throw std::runtime_error("Could not open font index: " + filename);
+    }
+    std::string line;
+    if (!std::getline(in, line) || line != font_index_header)
+    {
+        throw std::runtime_error("Not a mapnik font index: " + filename);
+    }
+    // Faces are added without opening the files, which no public freetype_engine
+    // function allows: register_font always loads the file with FreeType.
+    // get_mapping() returns the process wide mapping that register_font itself
+    // fills, only the accessor is const. The entries are inserted exactly as
+    // register_font inserts them (emplace keeps an existing face), but without the
+    // lock register_font takes: loading an index is NOT safe while other threads
+    // render or register fonts. mapnik.register_fonts only loads it at import
+    // time or, with MAPNIK_LAZY_FONTS, before the first map is used.
+    auto & mapping = const_cast<font_file_mapping_type&>(freetype_engine::get_mapping());
+    std::map<std::string, bool> checked;
+    std::vector<std::string> files;
+    while (std::getline(in, line))
+    {
+        std::vector<std::string> fields;
+        std::istringstream ss(line);
+        std::string field;
+        while (std::getline(ss, field, '\t')) fields.push_back(field);
+        if (fields.size() != 5) continue;
+        // skip damaged lines rather than failing the whole index
+        int face_index = 0;
+        auto parsed = std::from_chars(fields[1].data(), fields[1].data() + fields[1].size(), face_index);
+        if (parsed.ec != std::errc() || parsed.ptr != fields[1].data() + fields[1].size()) continue;
+        std::string const& file = fields[2];
+        auto itr = checked.find(file);
+        if (itr == checked.end())
+        {
+            std::string signature;
+            bool valid = font_file_signature(file, signature) && signature == fields[3] + '\t' + fields[4];
+            itr = checked.emplace(file, valid).first;
+            if (valid) files.push_back(file);
+        }
+        // an empty face name records a font file without usable faces
+        if (itr->second && !fields[0].empty())
+        {
+            mapping.emplace(fields[0], std::make_pair(face_index, file));
+        }
+    }
+    return files;
+}
 
+} // namespace
+
+void export_font_engine(py::module const& m)
+{
     py::class_<freetype_engine>(m, "FontEngine")
         .def_static("register_font", &freetype_engine::register_font)
         .def_static("register_fonts", &freetype_engine::register_fonts)
         .def_static("face_names", &freetype_engine::face_names)
+        .def_static("save_index", &save_index,
+                    "Save the registered face names and their font files to an index file.\n"
+                    "Font files listed in `files` that have no registered face are recorded\n"
+                    "too, so that loading the index does not probe them again.\n"
+                    "\n"
+                    "Usage:\n"
+                    ">>> FontEngine.save_index('/var/cache/mapnik/fonts.idx')\n",
+                    py::arg("path"), py::arg("files") = std::vector<std::string>())
+        .def_static("load_index", &load_index,
+                    "Register the faces of a saved index without opening the font files.\n"
+                    "Entries whose file changed size or modification time are skipped.\n"
+                    "Returns the list of indexed font files that are still up to date.\n"
+                    "Not thread safe: do not call it while other threads render or\n"
+                    "register fonts.\n"
+                    "\n"
+                    "Usage:\n"
+                    ">>> FontEngine.load_index('/var/cache/mapnik/fonts.idx')\n",
+                    py::arg("path"))
         ;
 }
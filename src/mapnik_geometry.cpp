@@ -39,9 +39,16 @@
 #include <mapnik/util/geometry_to_wkt.hpp> // to_wkt
 #include <mapnik/wkb.hpp>
 #include "python_variant.hpp"
+#include "python_arrow.hpp"
+#include "python_wkb.hpp"
 
 // stl
+#include <cstdint>
+#include <memory>
 #include <stdexcept>
+#include <string>
+#include <utility>
+#include <vector>
 
 //pybind11
 #include <pybind11/pybind11.h>
@@ -82,6 +89,192 @@ std::shared_ptr<mapnik::geometry::geometry<double> > from_geojson_impl(std::stri
     return geom;
 }
 
+enum class geometry_format
+{
+    wkb,
+    wkt,
+    geojson
+};
+
+// Views on the encoded geometries of a Python sequence or an Arrow array,
+// a null data pointer marks a missing or unusable item.
+// `owners` keeps alive whatever the views point into.
+struct encoded_geometries
+{
+    std::vector<std::pair<char const*, std::size_t>> items;
+    std::vector<py::object> owners;
+};
+
+// Arrow binary or string array exported through the PyCapsule interface (__arrow_c_array__)
+void read_arrow_array(py::handle const& obj, encoded_geometries & out)
+{
+    py::tuple capsules = obj.attr("__arrow_c_array__")();
+    if (capsules.size() != 2)
+    {
+        throw std::runtime_error("__arrow_c_array__ must return a (schema, array) tuple of capsules");
+    }
+    py::object schema_capsule = capsules[0];
+    py::object array_capsule = capsules[1];
+    auto* schema = static_cast<ArrowSchema*>(PyCapsule_GetPointer(schema_capsule.ptr(), "arrow_schema"));
+    if (!schema) throw py::error_already_set();
+    auto* array = static_cast<ArrowArray*>(PyCapsule_GetPointer(array_capsule.ptr(), "arrow_array"));
+    if (!array) throw py::error_already_set();
+    std::string format(schema->format);
+    bool large = format == "Z" || format == "U";
+    if (!large && format != "z" && format != "u")
+    {
+        throw std::runtime_error("expected an Arrow binary or string array, got format '" + format + "'");
+    }
+    auto const* validity = static_cast<std::uint8_t const*>(array->buffers[0]);
+    auto const* data = static_cast<char const*>(array->buffers[2]);
+    out.items.reserve(out.items.size() + static_cast<std::size_t>(array->length));
+    for (std::int64_t i = 0; i < array->length; ++i)
+    {
+        std::int64_t j = i + array->offset;
+        if (validity && !mapnik::arrow::get_bit(validity, j))
+        {
+            out.items.emplace_back(nullptr, 0);
+            continue;
+        }
+        std::int64_t begin, end;
+        if (large)
+        {
+            auto const* offsets = static_cast<std::int64_t const*>(array->buffers[1]);
+            begin = offsets[j];
+            end = offsets[j + 1];
+        }
+        else
+        {
+            auto const* offsets = static_cast<std::int32_t const*>(array->buffers[1]);
+            begin = offsets[j];
+            end = offsets[j + 1];
+        }
+        // the data buffer of an array of empty values may be null
+        out.items.emplace_back(data ? data + begin : "", static_cast<std::size_t>(end - begin));
+    }
+    // the capsules release the Arrow data once they are destroyed
+    out.owners.push_back(std::move(capsules));
+}
+
+// any iterable of bytes-like objects, or of str for the text formats
+void read_sequence(py::handle const& obj, bool text, encoded_geometries & out)
+{
+    for (auto item : obj)
+    {
+        py::object owner;
+        char const* data = nullptr;
+        Py_ssize_t size = 0;
+        if (PyUnicode_Check(item.ptr()))
+        {
+            if (text)
+            {
+                data = PyUnicode_AsUTF8AndSize(item.ptr(), &size);
+                if (!data) throw py::error_already_set();
+                owner = py::reinterpret_borrow<py::object>(item);
+            }
+        }
+        else if (!item.is_none())
+        {
+            owner = PyBytes_Check(item.ptr()) ? py::reinterpret_borrow<py::object>(item)
+                                              : py::reinterpret_steal<py::object>(PyBytes_FromObject(item.ptr()));
+            if (owner)
+            {
+                data = PyBytes_AS_STRING(owner.ptr());
+                size = PyBytes_GET_SIZE(owner.ptr());
+            }
+            else
+            {
+                // not bytes-like: reported as invalid
+                PyErr_Clear();
+            }
+        }
+        out.items.emplace_back(data, static_cast<std::size_t>(size));
+        if (owner) out.owners.push_back(std::move(owner));
+    }
+}
+
+bool parse_geometry(geometry_format format, char const* data, std::size_t size,
+                    mapnik::geometry::geometry<double> & geom)
+{
+    try
+    {
+        switch (format)
+        {
+        case geometry_format::wkb:
+            return mapnik::parse_wkb(data, size, geom);
+        case geometry_format::wkt:
+            return mapnik::from_wkt(std::string(data, size), geom);
+        case geometry_format::geojson:
+            return mapnik::json::from_geojson(std::string(data, size), geom);
+        }
+    }
+    catch (...)
+    {
+    }
+    return false;
+}
+
+// Parses every item in one loop without the GIL. Returns (geometries, invalid) where
+// geometries is a list holding None for invalid items, or a GeometryCollection of the
+// valid ones, and invalid lists the indices of the items that could not be parsed.
+py::tuple from_many_impl(py::object const& geometries, geometry_format format, bool collection)
+{
+    encoded_geometries input;
+    if (py::hasattr(geometries, "__arrow_c_array__")) read_arrow_array(geometries, input);
+    else read_sequence(geometries, format != geometry_format::wkb, input);
+    std::size_t count = input.items.size();
+    std::vector<mapnik::geometry::geometry<double>> parsed(count);
+    std::vector<char> valid(count, 0);
+    std::vector<std::size_t> invalid;
+    {
+        py::gil_scoped_release release;
+        for (std::size_t i = 0; i < count; ++i)
+        {
+            auto const& item = input.items[i];
+            valid[i] = item.first && parse_geometry(format, item.first, item.second, parsed[i]);
+            if (!valid[i]) invalid.push_back(i);
+        }
+    }
+    if (collection)
+    {
+        mapnik::geometry::geometry_collection<double> result;
+        result.reserve(count - invalid.size());
+        for (std::size_t i = 0; i < count; ++i)
+        {
+            if (valid[i]) result.push_back(std::move(parsed[i]));
+        }
+        return py::make_tuple(std::move(result), invalid);
+    }
+    py::list result(count);
+    for (std::size_t i = 0; i < count; ++i)
+    {
+        if (valid[i])
+        {
+            result[i] = std::make_shared<mapnik::geometry::geometry<double>>(std::move(parsed[i]));
+        }
+        else
+        {
+            result[i] = py::none();
+        }
+    }
+    return py::make_tuple(result, invalid);
+}
+
+py::tuple from_wkb_many_impl(py::object const& geometries, bool collection)
+{
+    return from_many_impl(geometries, geometry_format::wkb, collection);
+}
+
+py::tuple from_wkt_many_impl(py::object const& geometries, bool collection)
+{
+    return from_many_impl(geometries, geometry_format::wkt, collection);
+}
+
+py::tuple from_geojson_many_impl(py::object const& geometries, bool collection)
+{
+    return from_many_impl(geometries, geometry_format::geojson, collection);
+}
+
 }
 
 template <typename GeometryType>
@@ -333,6 +526,20 @@ void export_geometry(py::module const& m)
         .def_static("from_geojson", from_geojson_impl)
         .def_static("from_wkt", from_wkt_impl)
         .def_static("from_wkb", from_wkb_impl)
+        .def_static("from_geojson_many", from_geojson_many_impl,
+                    py::arg("geometries"), py::arg("collection") = false,
+                    "Parses a sequence of GeoJSON str/bytes or an Arrow string array.\n"
+                    "Returns (geometries, invalid): a list with None for the items that\n"
+                    "could not be parsed (or a GeometryCollection of the valid ones if\n"
+                    "collection=True) and the list of their indices.")
+        .def_static("from_wkt_many", from_wkt_many_impl,
+                    py::arg("geometries"), py::arg("collection") = false,
+                    "Parses a sequence of WKT str/bytes or an Arrow string array.\n"
+                    "Returns (geometries, invalid), see from_geojson_many.")
+        .def_static("from_wkb_many", from_wkb_many_impl,
+                    py::arg("geometries"), py::arg("collection") = false,
+                    "Parses a sequence of bytes-like WKB or an Arrow binary array.\n"
+                    "Returns (geometries, invalid), see from_geojson_many.")
         .def("__str__",&to_wkt_impl<geometry<double>>)
         .def("type",&geometry_type_impl)
         .def("is_valid", &geometry_is_valid_impl<geometry<double>>)
@@ -30,6 +30,9 @@
 #include <mapnik/image_compositing.hpp>
 #include <mapnik/image_view_any.hpp>
 //stl
+#include <cctype>
+#include <cstdint>
+#include <memory>
 #include <type_traits>
 //pybind11
 #include <pybind11/pybind11.h>
@@ -54,28 +57,39 @@ py::object to_string1(image_any const& im)
 // encode (png,jpeg)
 py::object to_string2(image_any const & im, std::string const& format)
 {
-    std::string s = mapnik::save_to_string(im, format);
+    std::string s;
+    {
+        py::gil_scoped_release release;
+        s = mapnik::save_to_string(im, format);
+    }
     return py::bytes(s.data(), s.length());
 }
 
 py::object to_string3(image_any const & im, std::string const& format, mapnik::rgba_palette const& pal)
 {
-    std::string s = mapnik::save_to_string(im, format, pal);
+    std::string s;
+    {
+        py::gil_scoped_release release;
+        s = mapnik::save_to_string(im, format, pal);
+    }
     return py::bytes(s.data(), s.length());
 }
 
 void save_to_file1(mapnik::image_any const& im, std::string const& filename)
 {
+    py::gil_scoped_release release;
     save_to_file(im,filename);
 }
 
 void save_to_file2(mapnik::image_any const& im, std::string const& filename, std::string const& type)
 {
+    py::gil_scoped_release release;
     save_to_file(im,filename,type);
 }
 
 void save_to_file3(mapnik::image_any const& im, std::string const& filename, std::string const& type, mapnik::rgba_palette const& pal)
 {
+    py::gil_scoped_release release;
     save_to_file(im,filename,type,pal);
 }
 
@@ -243,6 +257,80 @@ std::shared_ptr<image_any> from_memoryview(py::memoryview const& memview)
     throw mapnik::image_reader_exception("Failed to load image from Buffer" );
 }
 
+template <typename T>
+std::shared_ptr<image_any> wrap_buffer(std::unique_ptr<py::buffer_info> view, int width, int height,
+                                       bool premultiplied, bool copy)
+{
+    std::size_t size = static_cast<std::size_t>(width) * static_cast<std::size_t>(height) * sizeof(typename T::pixel_type);
+    if (static_cast<std::size_t>(view->size * view->itemsize) != size)
+    {
+        throw std::runtime_error("Buffer size does not match image dimensions and type");
+    }
+    // non-owning image pointing at the buffer memory
+    T wrapper(width, height, static_cast<unsigned char*>(view->ptr), premultiplied);
+    if (copy)
+    {
+        return std::make_shared<image_any>(T(wrapper));
+    }
+    // keep the buffer exported (and alive) for as long as the image exists
+    py::buffer_info* raw = view.release();
+    return std::shared_ptr<image_any>(new image_any(std::move(wrapper)),
+                                      [raw](image_any* im) {
+                                          delete im;
+                                          py::gil_scoped_acquire gil;
+                                          delete raw;
+                                      });
+}
+
+std::shared_ptr<image_any> frombuffer(py::buffer const& obj, int width, int height,
+                                      mapnik::image_dtype type, bool premultiplied, bool copy)
+{
+    if (width <= 0 || height <= 0)
+    {
+        throw std::runtime_error("Image width and height must be greater than zero");
+    }
+    std::unique_ptr<py::buffer_info> view(new py::buffer_info(obj.request()));
+    py::ssize_t stride = view->itemsize;
+    for (py::ssize_t i = view->ndim; i > 0; --i)
+    {
+        if (view->shape[i - 1] > 1 && view->strides[i - 1] != stride)
+        {
+            throw std::runtime_error("Buffer must be C-contiguous");
+        }
+        stride *= view->shape[i - 1];
+    }
+    // never hand out writable pixels backed by immutable memory
+    if (view->readonly) copy = true;
+
+    switch (type)
+    {
+    case mapnik::image_dtype_rgba8:
+        return wrap_buffer<mapnik::image_rgba8>(std::move(view), width, height, premultiplied, copy);
+    case mapnik::image_dtype_gray8:
+        return wrap_buffer<mapnik::image_gray8>(std::move(view), width, height, premultiplied, copy);
+    case mapnik::image_dtype_gray8s:
+        return wrap_buffer<mapnik::image_gray8s>(std::move(view), width, height, premultiplied, copy);
+    case mapnik::image_dtype_gray16:
+        return wrap_buffer<mapnik::image_gray16>(std::move(view), width, height, premultiplied, copy);
+    case mapnik::image_dtype_gray16s:
+        return wrap_buffer<mapnik::image_gray16s>(std::move(view), width, height, premultiplied, copy);
+    case mapnik::image_dtype_gray32:
+        return wrap_buffer<mapnik::image_gray32>(std::move(view), width, height, premultiplied, copy);
+    case mapnik::image_dtype_gray32s:
+        return wrap_buffer<mapnik::image_gray32s>(std::move(view), width, height, premultiplied, copy);
+    case mapnik::image_dtype_gray32f:
+        return wrap_buffer<mapnik::image_gray32f>(std::move(view), width, height, premultiplied, copy);
+    case mapnik::image_dtype_gray64:
+        return wrap_buffer<mapnik::image_gray64>(std::move(view), width, height, premultiplied, copy);
+    case mapnik::image_dtype_gray64s:
+        return wrap_buffer<mapnik::image_gray64s>(std::move(view), width, height, premultiplied, copy);
+    case mapnik::image_dtype_gray64f:
+        return wrap_buffer<mapnik::image_gray64f>(std::move(view), width, height, premultiplied, copy);
+    default:
+        throw std::runtime_error("Unsupported image type");
+    }
+}
+
 void set_grayscale_to_alpha(image_any & im)
 {
     mapnik::set_grayscale_to_alpha(im);
@@ -298,6 +386,78 @@ void composite(image_any & dst, image_any & src, mapnik::composite_mode_e mode,
     }
 }
 
+// expose pixels through the buffer protocol without copying
+struct buffer_info_visitor
+{
+    py::buffer_info operator() (mapnik::image_null &)
+    {
+        throw std::runtime_error("Can not create a buffer from a null image");
+    }
+
+    py::buffer_info operator() (mapnik::image_rgba8 & im)
+    {
+        // rgba8 pixels are presented as height x width x 4 channels
+        return py::buffer_info(im.bytes(),
+                               sizeof(std::uint8_t),
+                               py::format_descriptor<std::uint8_t>::format(),
+                               3,
+                               {static_cast<py::ssize_t>(im.height()),
+                                static_cast<py::ssize_t>(im.width()),
+                                py::ssize_t(4)},
+                               {static_cast<py::ssize_t>(im.row_size()),
+                                static_cast<py::ssize_t>(4 * sizeof(std::uint8_t)),
+                                static_cast<py::ssize_t>(sizeof(std::uint8_t))});
+    }
+
+    template <typename T>
+    py::buffer_info operator() (T & im)
+    {
+        using pixel_type = typename T::pixel_type;
+        return py::buffer_info(im.bytes(),
+                               sizeof(pixel_type),
+                               py::format_descriptor<pixel_type>::format(),
+                               2,
+                               {static_cast<py::ssize_t>(im.height()),
+                                static_cast<py::ssize_t>(im.width())},
+                               {static_cast<py::ssize_t>(im.row_size()),
+                                static_cast<py::ssize_t>(sizeof(pixel_type))});
+    }
+};
+
+py::buffer_info get_buffer(image_any & im)
+{
+    return mapnik::util::apply_visitor(buffer_info_visitor(), im);
+}
+
+// https://numpy.org/doc/stable/reference/arrays.interface.html
+py::dict array_interface(image_any & im)
+{
+    py::buffer_info info = get_buffer(im);
+    char format = info.format.back();
+    char kind = 'u';
+    if (format == 'f' || format == 'd') kind = 'f';
+    else if (std::islower(static_cast<unsigned char>(format))) kind = 'i';
+    std::uint16_t const one = 1;
+    bool const little_endian = *reinterpret_cast<std::uint8_t const*>(&one) == 1;
+    char byte_order = (info.itemsize == 1) ? '|' : (little_endian ? '<' : '>');
+    std::string typestr = std::string(1, byte_order) + kind + std::to_string(info.itemsize);
+
+    py::tuple shape(info.ndim);
+    py::tuple strides(info.ndim);
+    for (py::ssize_t i = 0; i < info.ndim; ++i)
+    {
+        shape[i] = info.shape[i];
+        strides[i] = info.strides[i];
+    }
+    py::dict desc;
+    desc["version"] = 3;
+    desc["shape"] = shape;
+    desc["strides"] = strides;
+    desc["typestr"] = typestr;
+    desc["data"] = py::make_tuple(reinterpret_cast<std::uintptr_t>(info.ptr), false);
+    return desc;
+}
+
 std::shared_ptr<image_any> from_cairo(py::object const& surface)
 {
     py::object ImageSurface = py::module_::import("cairo").attr("ImageSurface");
@@ -376,7 +536,8 @@ void export_image(py::module const& m)
         .finalize()
         ;
 
-    py::class_<image_any,std::shared_ptr<image_any>>(m, "Image","This class represents a image.")
+    py::class_<image_any,std::shared_ptr<image_any>>(m, "Image","This class represents a image.", py::buffer_protocol())
+        .def_buffer(&get_buffer)
         .def(py::init<int,int>())
         .def(py::init<int,int,mapnik::image_dtype>())
         .def(py::init<int,int,mapnik::image_dtype,bool>())
@@ -429,6 +590,13 @@ void export_image(py::module const& m)
              py::arg("x"), py::arg("y"))
         .def("get_pixel", &get_pixel)
         .def("get_type",&get_type)
+        .def_property_readonly("__array_interface__", &array_interface,
+                               "NumPy array interface sharing memory with the Image.\n"
+                               "\n"
+                               "Usage:\n"
+                               ">>> import numpy as np\n"
+                               ">>> im = Image(256, 256)\n"
+                               ">>> pixels = np.asarray(im) # shape (256, 256, 4), dtype uint8\n")
         .def("clear",&clear)
         .def("to_string",&to_string1)
         .def("to_string",&to_string2)
@@ -442,6 +610,22 @@ void export_image(py::module const& m)
         .def_static("from_memoryview",&from_memoryview)
         .def_static("from_string",&from_string)
         .def_static("from_cairo",&from_cairo)
+        .def_static("frombuffer",&frombuffer,
+                    "Create an Image from raw pixels held in any object\n"
+                    "supporting the buffer protocol (bytearray, mmap, numpy array).\n"
+                    "Writable C-contiguous buffers are shared with the Image without\n"
+                    "copying; read-only buffers, or copy=True, are copied once.\n"
+                    "\n"
+                    "Usage:\n"
+                    ">>> data = bytearray(256 * 256 * 4)\n"
+                    ">>> im = Image.frombuffer(data, 256, 256)\n"
+                    ">>> dem = Image.frombuffer(elevation, 256, 256, ImageType.gray32f)\n",
+                    py::arg("buffer"),
+                    py::arg("width"),
+                    py::arg("height"),
+                    py::arg("type") = mapnik::image_dtype_rgba8,
+                    py::arg("premultiplied") = false,
+                    py::arg("copy") = false)
         ;
 
 }
@@ -42,21 +42,34 @@ namespace py = pybind11;
 // output 'raw' pixels
 py::object view_tostring1(image_view_any const& view)
 {
-    std::ostringstream ss(std::ios::out|std::ios::binary);
-    mapnik::view_to_stream(view, ss);
-    return py::bytes(ss.str().c_str(), ss.str().size());
+    std::string s;
+    {
+        py::gil_scoped_release release;
+        std::ostringstream ss(std::ios::out|std::ios::binary);
+        mapnik::view_to_stream(view, ss);
+        s = ss.str();
+    }
+    return py::bytes(s.data(), s.size());
 }
 
 // encode (png,jpeg)
 py::object view_tostring2(image_view_any const & view, std::string const& format)
 {
-    std::string s = save_to_string(view, format);
+    std::string s;
+    {
+        py::gil_scoped_release release;
+        s = save_to_string(view, format);
+    }
     return py::bytes(s.data(), s.length());
 }
 
 py::object view_tostring3(image_view_any const & view, std::string const& format, mapnik::rgba_palette const& pal)
 {
-    std::string s = save_to_string(view, format, pal);
+    std::string s;
+    {
+        py::gil_scoped_release release;
+        s = save_to_string(view, format, pal);
+    }
     return py::bytes(s.data(), s.length());
 }
 
@@ -68,6 +81,7 @@ bool is_solid(image_view_any const& view)
 void save_view1(image_view_any const& view,
                 std::string const& filename)
 {
+    py::gil_scoped_release release;
     save_to_file(view,filename);
 }
 
@@ -75,6 +89,7 @@ void save_view2(image_view_any const& view,
                 std::string const& filename,
                 std::string const& type)
 {
+    py::gil_scoped_release release;
     save_to_file(view,filename,type);
 }
 
@@ -83,6 +98,7 @@ void save_view3(image_view_any const& view,
                 std::string const& type,
                 mapnik::rgba_palette const& pal)
 {
+    py::gil_scoped_release release;
     save_to_file(view,filename,type,pal);
 }
 
@@ -29,8 +29,21 @@
 #include <mapnik/projection.hpp>
 #include <mapnik/view_transform.hpp>
 #include <mapnik/feature_type_style.hpp>
+#include <mapnik/datasource.hpp>
+#include <mapnik/feature.hpp>
+#include <mapnik/proj_transform.hpp>
 #include "mapnik_value_converter.hpp"
 #include "python_optional.hpp"
+#include "python_proj_transform.hpp"
+#include "python_thread_pool.hpp"
+//stl
+#include <algorithm>
+#include <mutex>
+#include <optional>
+#include <stdexcept>
+#include <string>
+#include <utility>
+#include <vector>
 //pybind11
 #include <pybind11/pybind11.h>
 #include <pybind11/operators.h>
@@ -118,6 +131,108 @@ void set_maximum_extent(mapnik::Map & m, boost::optional<mapnik::box2d<double> >
     }
 }
 
+// features found in each queried layer, in layer order
+using layer_features = std::vector<std::pair<std::string, std::vector<mapnik::feature_ptr>>>;
+
+std::vector<std::size_t> queried_layers(mapnik::Map const& m, std::optional<std::vector<std::string>> const& names)
+{
+    std::vector<layer> const& layers = m.layers();
+    if (names)
+    {
+        for (auto const& name : *names)
+        {
+            if (std::none_of(layers.begin(), layers.end(), [&name](layer const& lyr) { return lyr.name() == name; }))
+            {
+                throw py::key_error("No layer named '" + name + "'");
+            }
+        }
+    }
+    std::vector<std::size_t> indexes;
+    for (std::size_t i = 0; i < layers.size(); ++i)
+    {
+        if (!layers[i].datasource()) continue;
+        if (names && std::find(names->begin(), names->end(), layers[i].name()) == names->end()) continue;
+        indexes.push_back(i);
+    }
+    return indexes;
+}
+
+void collect_features(mapnik::featureset_ptr const& fs, std::vector<mapnik::feature_ptr> & features)
+{
+    if (!fs) return;
+    while (mapnik::feature_ptr feature = fs->next())
+    {
+        features.push_back(std::move(feature));
+    }
+}
+
+py::dict group_by_layer(layer_features const& results)
+{
+    py::dict grouped;
+    for (auto const& item : results)
+    {
+        py::str name(item.first);
+        py::list features = grouped.contains(name) ? py::list(grouped[name]) : py::list();
+        for (auto const& feature : item.second) features.append(py::cast(feature));
+        grouped[name] = features;
+    }
+    return grouped;
+}
+
+py::dict query_box(mapnik::Map const& m, box2d<double> const& box,
+                   std::optional<std::vector<std::string>> const& layer_names,
+                   std::optional<std::vector<std::string>> const& fields,
+                   std::size_t threads)
+{
+    std::vector<std::size_t> indexes = queried_layers(m, layer_names);
+    layer_features results(indexes.size());
+    {
+        py::gil_scoped_release release;
+        mapnik::parallel_for(indexes.size(), threads, [&](std::size_t i) {
+            layer const& lyr = m.layers()[indexes[i]];
+            mapnik::datasource_ptr ds = lyr.datasource();
+            mapnik::python_proj_transform_ptr prj_trans = mapnik::transform_cache().get(lyr.srs(), m.srs());
+            box2d<double> layer_box = box;
+            bool projected;
+            {
+                std::lock_guard<std::mutex> lock(prj_trans->mutex);
+                projected = prj_trans->equal() || prj_trans->backward(layer_box, 20);
+            }
+            if (!projected)
+            {
+                throw std::runtime_error("query_box: could not project box into the srs of layer '" + lyr.name() + "'");
+            }
+            mapnik::query q(layer_box);
+            if (fields)
+            {
+                for (auto const& name : *fields) q.add_property_name(name);
+            }
+            else
+            {
+                for (auto const& desc : ds->get_descriptor().get_descriptors()) q.add_property_name(desc.get_name());
+            }
+            results[i].first = lyr.name();
+            collect_features(ds->features(q), results[i].second);
+        });
+    }
+    return group_by_layer(results);
+}
+
+py::dict query_point_all(mapnik::Map const& m, double x, double y,
+                         std::optional<std::vector<std::string>> const& layer_names,
+                         std::size_t threads)
+{
+    std::vector<std::size_t> indexes = queried_layers(m, layer_names);
+    layer_features results(indexes.size());
+    {
+        py::gil_scoped_release release;
+        mapnik::parallel_for(indexes.size(), threads, [&](std::size_t i) {
+            results[i].first = m.layers()[indexes[i]].name();
+            collect_features(m.query_point(static_cast<unsigned>(indexes[i]), x, y), results[i].second);
+        });
+    }
+    return group_by_layer(results);
+}
 
 } //namespace
 
@@ -525,6 +640,45 @@ void export_map(py::module const& m)
                       ">>> m.width\n"
                       "800\n"
             )
+        .def("query_box", query_box,
+             "Query the layers of the Map for features intersecting a box\n"
+             "given in the coordinates of the map projection.\n"
+             "The layers are queried concurrently on up to `threads` threads\n"
+             "(0 means one per core) with the GIL released.\n"
+             "Returns a dict mapping layer names to lists of Features, whose\n"
+             "geometries are in the layer projection.\n"
+             "Only the given fields are requested from the datasources.\n"
+             "\n"
+             "Usage:\n"
+             ">>> results = m.query_box(Box2d(-122.5, 47, -122, 48), layers=['roads'], fields=['name'])\n"
+             ">>> results['roads']\n"
+             "[<mapnik._mapnik.Feature object at 0x3995630>]\n",
+             py::arg("box"), py::arg("layers") = py::none(), py::arg("fields") = py::none(),
+             py::arg("threads") = 0
+            )
+
+        .def("query_point_all", query_point_all,
+             "Query every layer with a datasource (or the named layers) for\n"
+             "features at the given x,y location in the coordinates of the map\n"
+             "projection, like query_point. The layers are queried concurrently\n"
+             "with the GIL released.\n"
+             "Returns a dict mapping layer names to lists of Features.\n"
+             "\n"
+             "Usage:\n"
+             ">>> results = m.query_point_all(-122, 48)\n"
+             ">>> sorted(results)\n"
+             "['roads', 'water']\n",
+             py::arg("x"), py::arg("y"), py::arg("layers") = py::none(), py::arg("threads") = 0
+            )
+
+        .def("__copy__", [](Map const& map) { return Map(map); },
+             "Return a copy of the Map sharing its layer datasources.\n"
+             "Copies can be rendered concurrently from different threads.\n"
+             "\n"
+             "Usage:\n"
+             ">>> import copy\n"
+             ">>> m2 = copy.copy(m)\n"
+            )
         // comparison
         .def(py::self == py::self)
         ;
@@ -26,20 +26,34 @@
 #include <mapnik/projection.hpp>
 #include <mapnik/coord.hpp>
 #include <mapnik/geometry/box2d.hpp>
+#include "python_proj_transform.hpp"
+#include "python_thread_pool.hpp"
 // stl
+#include <algorithm>
+#include <cmath>
+#include <limits>
+#include <memory>
+#include <mutex>
+#include <sstream>
 #include <stdexcept>
+#include <thread>
+#include <vector>
 //pybind11
 #include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
 
 namespace py = pybind11;
 
 using mapnik::proj_transform;
 using mapnik::projection;
+using mapnik::python_proj_transform;
+using mapnik::python_proj_transform_ptr;
 
 namespace  {
 
-mapnik::coord2d forward_transform_c(mapnik::proj_transform& t, mapnik::coord2d const& c)
+mapnik::coord2d forward_transform_c(python_proj_transform& t, mapnik::coord2d const& c)
 {
+    std::lock_guard<std::mutex> lock(t.mutex);
     double x = c.x;
     double y = c.y;
     double z = 0.0;
@@ -52,8 +66,9 @@ mapnik::coord2d forward_transform_c(mapnik::proj_transform& t, mapnik::coord2d c
     return mapnik::coord2d(x,y);
 }
 
-mapnik::coord2d backward_transform_c(mapnik::proj_transform& t, mapnik::coord2d const& c)
+mapnik::coord2d backward_transform_c(python_proj_transform& t, mapnik::coord2d const& c)
 {
+    std::lock_guard<std::mutex> lock(t.mutex);
     double x = c.x;
     double y = c.y;
     double z = 0.0;
@@ -66,8 +81,9 @@ mapnik::coord2d backward_transform_c(mapnik::proj_transform& t, mapnik::coord2d
     return mapnik::coord2d(x,y);
 }
 
-mapnik::box2d<double> forward_transform_env(mapnik::proj_transform& t, mapnik::box2d<double> const & box)
+mapnik::box2d<double> forward_transform_env(python_proj_transform& t, mapnik::box2d<double> const & box)
 {
+    std::lock_guard<std::mutex> lock(t.mutex);
     mapnik::box2d<double> new_box = box;
     if (!t.forward(new_box)) {
         std::ostringstream s;
@@ -78,8 +94,9 @@ mapnik::box2d<double> forward_transform_env(mapnik::proj_transform& t, mapnik::b
     return new_box;
 }
 
-mapnik::box2d<double> backward_transform_env(mapnik::proj_transform& t, mapnik::box2d<double> const & box)
+mapnik::box2d<double> backward_transform_env(python_proj_transform& t, mapnik::box2d<double> const & box)
 {
+    std::lock_guard<std::mutex> lock(t.mutex);
     mapnik::box2d<double> new_box = box;
     if (!t.backward(new_box)){
         std::ostringstream s;
@@ -90,8 +107,9 @@ mapnik::box2d<double> backward_transform_env(mapnik::proj_transform& t, mapnik::
     return new_box;
 }
 
-mapnik::box2d<double> forward_transform_env_p(mapnik::proj_transform& t, mapnik::box2d<double> const & box, unsigned int points)
+mapnik::box2d<double> forward_transform_env_p(python_proj_transform& t, mapnik::box2d<double> const & box, unsigned int points)
 {
+    std::lock_guard<std::mutex> lock(t.mutex);
     mapnik::box2d<double> new_box = box;
     if (!t.forward(new_box,points)) {
         std::ostringstream s;
@@ -102,8 +120,9 @@ mapnik::box2d<double> forward_transform_env_p(mapnik::proj_transform& t, mapnik:
     return new_box;
 }
 
-mapnik::box2d<double> backward_transform_env_p(mapnik::proj_transform& t, mapnik::box2d<double> const & box, unsigned int points)
+mapnik::box2d<double> backward_transform_env_p(python_proj_transform& t, mapnik::box2d<double> const & box, unsigned int points)
 {
+    std::lock_guard<std::mutex> lock(t.mutex);
     mapnik::box2d<double> new_box = box;
     if (!t.backward(new_box,points)){
         std::ostringstream s;
@@ -114,11 +133,222 @@ mapnik::box2d<double> backward_transform_env_p(mapnik::proj_transform& t, mapnik
     return new_box;
 }
 
+// Transforms `count` points whose coordinates are `stride` doubles apart, in place.
+// Points that cannot be transformed become NaN and are flagged in `failed`.
+// Pure C++: call with the GIL released.
+void transform_points(python_proj_transform& t, bool forward, double* x, double* y,
+                      std::size_t count, std::size_t stride, bool* failed)
+{
+    std::vector<double> backup(count * 2);
+    for (std::size_t i = 0; i < count; ++i)
+    {
+        backup[2 * i] = x[i * stride];
+        backup[2 * i + 1] = y[i * stride];
+    }
+    std::vector<double> z(count * stride, 0.0);
+    std::lock_guard<std::mutex> lock(t.mutex);
+    bool ok = forward ? t.forward(x, y, z.data(), count, stride)
+                      : t.backward(x, y, z.data(), count, stride);
+    for (std::size_t i = 0; i < count; ++i)
+    {
+        double & px = x[i * stride];
+        double & py = y[i * stride];
+        bool success = true;
+        if (!ok)
+        {
+            // the bulk call gave up: redo every point from its original coordinates
+            px = backup[2 * i];
+            py = backup[2 * i + 1];
+            double pz = 0.0;
+            success = forward ? t.forward(px, py, pz) : t.backward(px, py, pz);
+        }
+        // PROJ reports per point failures as HUGE_VAL
+        failed[i] = !success || !std::isfinite(px) || !std::isfinite(py);
+        if (failed[i])
+        {
+            px = std::numeric_limits<double>::quiet_NaN();
+            py = std::numeric_limits<double>::quiet_NaN();
+        }
+    }
+}
+
+using coord_array = py::array_t<double, py::array::c_style>;
+
+py::array_t<bool> transform_xy(python_proj_transform& t, bool forward, coord_array & x, coord_array & y)
+{
+    if (x.ndim() != 1 || y.ndim() != 1 || x.size() != y.size())
+    {
+        std::ostringstream s;
+        s << "x and y must be one dimensional arrays of the same length, got "
+          << x.size() << " and " << y.size() << " values";
+        throw std::runtime_error(s.str());
+    }
+    std::size_t count = static_cast<std::size_t>(x.size());
+    double* xs = x.mutable_data();
+    double* ys = y.mutable_data();
+    py::array_t<bool> failed(count);
+    bool* mask = failed.mutable_data();
+    {
+        py::gil_scoped_release release;
+        transform_points(t, forward, xs, ys, count, 1, mask);
+    }
+    return failed;
+}
+
+py::array_t<bool> transform_interleaved(python_proj_transform& t, bool forward, coord_array & xy)
+{
+    bool flat = xy.ndim() == 1 && xy.size() % 2 == 0;
+    if (!flat && !(xy.ndim() == 2 && xy.shape(1) == 2))
+    {
+        throw std::runtime_error("expected an (N, 2) array or a flat array of interleaved x, y values");
+    }
+    std::size_t count = static_cast<std::size_t>(xy.size() / 2);
+    double* data = xy.mutable_data();
+    py::array_t<bool> failed(count);
+    bool* mask = failed.mutable_data();
+    {
+        py::gil_scoped_release release;
+        transform_points(t, forward, data, data + 1, count, 2, mask);
+    }
+    return failed;
+}
+
+py::array_t<bool> forward_transform_xy(python_proj_transform& t, coord_array x, coord_array y)
+{
+    return transform_xy(t, true, x, y);
+}
+
+py::array_t<bool> backward_transform_xy(python_proj_transform& t, coord_array x, coord_array y)
+{
+    return transform_xy(t, false, x, y);
+}
+
+py::array_t<bool> forward_transform_interleaved(python_proj_transform& t, coord_array xy)
+{
+    return transform_interleaved(t, true, xy);
+}
+
+py::array_t<bool> backward_transform_interleaved(python_proj_transform& t, coord_array xy)
+{
+    return transform_interleaved(t, false, xy);
+}
+
+using box_array = py::array_t<double, py::array::c_style | py::array::forcecast>;
+
+// Reprojects an (N, 4) array of minx, miny, maxx, maxy rows, densifying each edge
+// with `points` points. Boxes are split in chunks processed in parallel, every chunk
+// but the first one with its own proj_transform. Failed rows become NaN.
+py::array_t<double> transform_boxes(python_proj_transform& t, bool forward, box_array const& boxes,
+                                    int points, std::size_t threads)
+{
+    if (boxes.ndim() != 2 || boxes.shape(1) != 4)
+    {
+        throw std::runtime_error("expected an (N, 4) array of minx, miny, maxx, maxy rows");
+    }
+    // a PROJ initialisation only pays off for enough boxes
+    constexpr std::size_t min_chunk_size = 256;
+    std::size_t count = static_cast<std::size_t>(boxes.shape(0));
+    py::array_t<double> result(std::vector<py::ssize_t>{static_cast<py::ssize_t>(count), 4});
+    double const* in = boxes.data();
+    double* out = result.mutable_data();
+    {
+        py::gil_scoped_release release;
+        if (threads == 0)
+        {
+            threads = std::max(1u, std::thread::hardware_concurrency());
+        }
+        std::size_t chunks = std::max<std::size_t>(1, std::min(threads, (count + min_chunk_size - 1) / min_chunk_size));
+        mapnik::parallel_for(chunks, chunks, [&](std::size_t chunk) {
+            std::unique_lock<std::mutex> lock;
+            std::unique_ptr<proj_transform> own;
+            proj_transform const* tr = &t;
+            if (chunk == 0)
+            {
+                lock = std::unique_lock<std::mutex>(t.mutex);
+            }
+            else
+            {
+                own = std::make_unique<proj_transform>(projection(t.source_srs, true),
+                                                       projection(t.dest_srs, true));
+                tr = own.get();
+            }
+            for (std::size_t i = count * chunk / chunks; i < count * (chunk + 1) / chunks; ++i)
+            {
+                double const* row = in + 4 * i;
+                bool ok = std::all_of(row, row + 4, [](double v) { return std::isfinite(v); });
+                mapnik::box2d<double> box(row[0], row[1], row[2], row[3]);
+                ok = ok && (forward ? tr->forward(box, points) : tr->backward(box, points));
+                double* dest = out + 4 * i;
+                if (ok)
+                {
+                    dest[0] = box.minx();
+                    dest[1] = box.miny();
+                    dest[2] = box.maxx();
+                    dest[3] = box.maxy();
+                }
+                else
+                {
+                    std::fill(dest, dest + 4, std::numeric_limits<double>::quiet_NaN());
+                }
+            }
+        });
+    }
+    return result;
+}
+
+py::array_t<double> forward_transform_boxes(python_proj_transform& t, box_array const& boxes,
+                                            int points, std::size_t threads)
+{
+    return transform_boxes(t, true, boxes, points, threads);
 }
 
-void export_proj_transform (py::module const& m)
+py::array_t<double> backward_transform_boxes(python_proj_transform& t, box_array const& boxes,
+                                             int points, std::size_t threads)
 {
-    py::class_<proj_transform>(m, "ProjTransform")
+    return transform_boxes(t, false, boxes, points, threads);
+}
+
+// srs of a Projection or of a projection string
+std::string srs_of(py::handle const& obj)
+{
+    if (py::isinstance<py::str>(obj)) return obj.cast<std::string>();
+    return obj.cast<projection const&>().params();
+}
+
+python_proj_transform_ptr get_transform(py::object const& source, py::object const& dest)
+{
+    std::string source_srs = srs_of(source);
+    std::string dest_srs = srs_of(dest);
+    py::gil_scoped_release release;
+    return mapnik::transform_cache().get(source_srs, dest_srs);
+}
+
+py::dict transform_cache_info()
+{
+    auto stats = mapnik::transform_cache().stats();
+    py::dict info;
+    info["hits"] = stats.hits;
+    info["misses"] = stats.misses;
+    info["size"] = stats.size;
+    info["max_size"] = stats.max_size;
+    return info;
+}
+
+void set_transform_cache_size(std::size_t max_size)
+{
+    mapnik::transform_cache().set_max_size(max_size);
+}
+
+void clear_transform_cache()
+{
+    mapnik::transform_cache().clear();
+}
+
+}
+
+void export_proj_transform (py::module& m) // non-const because of m.def(..)
+{
+    py::class_<python_proj_transform, python_proj_transform_ptr>(m, "ProjTransform")
         .def(py::init<projection const&, projection const&>(),
              "Constructs ProjTransform object")
         .def("forward", forward_transform_c)
@@ -127,7 +357,39 @@ void export_proj_transform (py::module const& m)
         .def("backward",backward_transform_env)
         .def("forward", forward_transform_env_p)
         .def("backward",backward_transform_env_p)
+        .def("forward", forward_transform_xy, py::arg("x").noconvert(), py::arg("y").noconvert(),
+             "Transforms float64 arrays of x and y in place, without the GIL.\n"
+             "Returns a bool array flagging the points that failed (set to NaN).")
+        .def("backward", backward_transform_xy, py::arg("x").noconvert(), py::arg("y").noconvert(),
+             "Back transforms float64 arrays of x and y in place, without the GIL.\n"
+             "Returns a bool array flagging the points that failed (set to NaN).")
+        .def("forward", forward_transform_interleaved, py::arg("xy").noconvert(),
+             "Transforms an (N, 2) or flat interleaved float64 array in place, without the GIL.\n"
+             "Returns a bool array flagging the points that failed (set to NaN).")
+        .def("backward", backward_transform_interleaved, py::arg("xy").noconvert(),
+             "Back transforms an (N, 2) or flat interleaved float64 array in place, without the GIL.\n"
+             "Returns a bool array flagging the points that failed (set to NaN).")
+        .def("forward_boxes", forward_transform_boxes,
+             py::arg("boxes"), py::arg("points") = 20, py::arg("threads") = 0,
+             "Transforms an (N, 4) array of minx, miny, maxx, maxy rows, densifying\n"
+             "each edge with `points` points. Runs in parallel without the GIL\n"
+             "(threads=0 uses every core). Returns a new array, failed rows are NaN.")
+        .def("backward_boxes", backward_transform_boxes,
+             py::arg("boxes"), py::arg("points") = 20, py::arg("threads") = 0,
+             "Back transforms an (N, 4) array of minx, miny, maxx, maxy rows, densifying\n"
+             "each edge with `points` points. Runs in parallel without the GIL\n"
+             "(threads=0 uses every core). Returns a new array, failed rows are NaN.")
         .def("definition",&proj_transform::definition)
         ;
 
+    m.def("get_transform", &get_transform, py::arg("src"), py::arg("dst"),
+          "Returns a ProjTransform from src to dst (Projection objects or srs strings),\n"
+          "shared through a process wide LRU cache.");
+    m.def("transform_cache_info", &transform_cache_info,
+          "Returns hits, misses, size and max_size of the get_transform cache.");
+    m.def("set_transform_cache_size", &set_transform_cache_size, py::arg("max_size"),
+          "Sets the number of transforms kept by get_transform, 0 disables caching.");
+    m.def("clear_transform_cache", &clear_transform_cache,
+          "Drops the cached transforms and resets the statistics.");
+
 }
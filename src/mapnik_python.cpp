@@ -30,12 +30,15 @@
 #include <mapnik/layer.hpp>
 #include <mapnik/agg_renderer.hpp>
 #include <mapnik/image_any.hpp>
+#include <mapnik/image_util.hpp>
+#include <mapnik/image_view_any.hpp>
 #include <mapnik/value.hpp>
 #include <mapnik/value/error.hpp>
 #include <mapnik/scale_denominator.hpp>
 #include <mapnik/label_collision_detector.hpp>
 #include "mapnik_value_converter.hpp"
 #include "python_to_value.hpp"
+#include "python_thread_pool.hpp"
 
 #if defined(GRID_RENDERER)
 #include "python_grid_utils.hpp"
@@ -53,8 +56,11 @@
 #endif
 
 //stl
+#include <chrono>
 #include <stdexcept>
 #include <fstream>
+#include <sstream>
+#include <vector>
 
 //pybind11
 #include <pybind11/pybind11.h>
@@ -341,9 +347,51 @@ void render_tile_to_file(mapnik::Map const& map,
 {
     mapnik::image_any image(width,height);
     render(map,image,1.0,offset_x, offset_y);
+    py::gil_scoped_release release;
     mapnik::save_to_file(image,file,format);
 }
 
+py::dict render_metatile(mapnik::Map const& map,
+                         mapnik::image_any& image,
+                         unsigned tiles_per_side,
+                         unsigned tile_size,
+                         std::string const& format,
+                         double scale_factor = 1.0,
+                         unsigned threads = 0)
+{
+    if (tiles_per_side == 0 || tile_size == 0)
+    {
+        throw std::runtime_error("tiles_per_side and tile_size must be greater than zero");
+    }
+    std::size_t metatile_size = static_cast<std::size_t>(tiles_per_side) * tile_size;
+    if (image.width() < metatile_size || image.height() < metatile_size)
+    {
+        std::ostringstream s;
+        s << "Image of " << image.width() << "x" << image.height()
+          << " is too small for " << tiles_per_side << "x" << tiles_per_side
+          << " tiles of " << tile_size << " pixels";
+        throw std::runtime_error(s.str());
+    }
+    std::vector<std::string> tiles(static_cast<std::size_t>(tiles_per_side) * tiles_per_side);
+    {
+        py::gil_scoped_release release;
+        mapnik::util::apply_visitor(agg_renderer_visitor_1(map, scale_factor, 0u, 0u), image);
+        mapnik::parallel_for(tiles.size(), threads, [&](std::size_t i) {
+            unsigned x = static_cast<unsigned>(i % tiles_per_side) * tile_size;
+            unsigned y = static_cast<unsigned>(i / tiles_per_side) * tile_size;
+            mapnik::image_view_any view = mapnik::create_view(image, x, y, tile_size, tile_size);
+            tiles[i] = mapnik::save_to_string(view, format);
+        });
+    }
+    py::dict result;
+    for (std::size_t i = 0; i < tiles.size(); ++i)
+    {
+        result[py::make_tuple(i % tiles_per_side, i / tiles_per_side)] =
+            py::bytes(tiles[i].data(), tiles[i].size());
+    }
+    return result;
+}
+
 void render_to_file1(mapnik::Map const& map,
                      std::string const& filename,
                      std::string const& format)
@@ -376,6 +424,7 @@ void render_to_file1(mapnik::Map const& map,
     {
         mapnik::image_any image(map.width(),map.height());
         render(map,image,1.0,0,0);
+        py::gil_scoped_release release;
         mapnik::save_to_file(image,filename,format);
     }
 }
@@ -395,6 +444,7 @@ void render_to_file2(mapnik::Map const& map,std::string const& filename)
     {
         mapnik::image_any image(map.width(),map.height());
         render(map,image,1.0,0,0);
+        py::gil_scoped_release release;
         mapnik::save_to_file(image,filename);
     }
 }
@@ -432,6 +482,7 @@ void render_to_file3(mapnik::Map const& map,
     {
         mapnik::image_any image(map.width(),map.height());
         render(map,image,scale_factor,0,0);
+        py::gil_scoped_release release;
         mapnik::save_to_file(image,filename,format);
     }
 }
@@ -570,6 +621,28 @@ bool has_cairo()
 #endif
 }
 
+// wall time in seconds spent in each export_* function during module init
+std::vector<std::pair<char const*, double>> module_init_times;
+
+template <typename Export>
+void timed_export(char const* name, Export export_func, py::module_ & m)
+{
+    auto start = std::chrono::steady_clock::now();
+    export_func(m);
+    std::chrono::duration<double> elapsed = std::chrono::steady_clock::now() - start;
+    module_init_times.emplace_back(name, elapsed.count());
+}
+
+py::list module_init_profile()
+{
+    py::list result;
+    for (auto const& item : module_init_times)
+    {
+        result.append(py::make_tuple(item.first, item.second));
+    }
+    return result;
+}
+
 } // namespace
 
 
@@ -580,7 +653,8 @@ void export_envelope(py::module const&);
 void export_gamma_method(py::module const&);
 void export_geometry(py::module const&);
 void export_feature(py::module const&);
-void export_featureset(py::module const&);
+void export_feature_batch(py::module const&);
+void export_featureset(py::module&); // non-const because of m.def(..)
 void export_font_engine(py::module const&);
 void export_fontset(py::module const&);
 void export_expression(py::module const&);
@@ -595,7 +669,8 @@ void export_image_view(py::module const&);
 void export_layer(py::module const&);
 void export_map(py::module const&);
 void export_projection(py::module&); // non-const because of m.def(..)
-void export_proj_transform(py::module const&);
+void export_proj_transform(py::module&); // non-const because of m.def(..)
+void export_view_transform(py::module const&);
 void export_query(py::module const&);
 void export_rule(py::module const&);
 void export_symbolizer(py::module const&);
@@ -628,53 +703,55 @@ using mapnik::save_map_to_string;
 
 
 PYBIND11_MODULE(_mapnik, m) {
-    export_color(m);
-    export_composite_modes(m);
-    export_coord(m);
-    export_envelope(m);
-    export_geometry(m);
-    export_gamma_method(m);
-    export_feature(m);
-    export_featureset(m);
-    export_font_engine(m);
-    export_fontset(m);
-    export_expression(m);
-    export_datasource(m);
-    export_datasource_cache(m);
+    timed_export("export_color", &export_color, m);
+    timed_export("export_composite_modes", &export_composite_modes, m);
+    timed_export("export_coord", &export_coord, m);
+    timed_export("export_envelope", &export_envelope, m);
+    timed_export("export_geometry", &export_geometry, m);
+    timed_export("export_gamma_method", &export_gamma_method, m);
+    timed_export("export_feature", &export_feature, m);
+    timed_export("export_feature_batch", &export_feature_batch, m);
+    timed_export("export_featureset", &export_featureset, m);
+    timed_export("export_font_engine", &export_font_engine, m);
+    timed_export("export_fontset", &export_fontset, m);
+    timed_export("export_expression", &export_expression, m);
+    timed_export("export_datasource", &export_datasource, m);
+    timed_export("export_datasource_cache", &export_datasource_cache, m);
 #if defined(GRID_RENDERER)
-    export_grid(m);
-    export_grid_view(m);
+    timed_export("export_grid", &export_grid, m);
+    timed_export("export_grid_view", &export_grid_view, m);
 #endif
-    export_image(m);
-    export_image_view(m);
-    export_layer(m);
-    export_map(m);
-    export_projection(m);
-    export_proj_transform(m);
-    export_query(m);
-    export_rule(m);
-    export_symbolizer(m);
-    export_polygon_symbolizer(m);
-    export_line_symbolizer(m);
-    export_point_symbolizer(m);
-    export_style(m);
-    export_logger(m);
-    export_placement_finder(m);
-    export_text_symbolizer(m);
-    export_palette(m);
-    export_parameters(m);
-    export_debug_symbolizer(m);
-    export_markers_symbolizer(m);
-    export_polygon_pattern_symbolizer(m);
-    export_line_pattern_symbolizer(m);
-    export_raster_symbolizer(m);
-    export_raster_colorizer(m);
-    export_scaling_method(m);
-    export_label_collision_detector(m);
-    export_dot_symbolizer(m);
-    export_shield_symbolizer(m);
-    export_group_symbolizer(m);
-    export_building_symbolizer(m);
+    timed_export("export_image", &export_image, m);
+    timed_export("export_image_view", &export_image_view, m);
+    timed_export("export_layer", &export_layer, m);
+    timed_export("export_map", &export_map, m);
+    timed_export("export_projection", &export_projection, m);
+    timed_export("export_proj_transform", &export_proj_transform, m);
+    timed_export("export_view_transform", &export_view_transform, m);
+    timed_export("export_query", &export_query, m);
+    timed_export("export_rule", &export_rule, m);
+    timed_export("export_symbolizer", &export_symbolizer, m);
+    timed_export("export_polygon_symbolizer", &export_polygon_symbolizer, m);
+    timed_export("export_line_symbolizer", &export_line_symbolizer, m);
+    timed_export("export_point_symbolizer", &export_point_symbolizer, m);
+    timed_export("export_style", &export_style, m);
+    timed_export("export_logger", &export_logger, m);
+    timed_export("export_placement_finder", &export_placement_finder, m);
+    timed_export("export_text_symbolizer", &export_text_symbolizer, m);
+    timed_export("export_palette", &export_palette, m);
+    timed_export("export_parameters", &export_parameters, m);
+    timed_export("export_debug_symbolizer", &export_debug_symbolizer, m);
+    timed_export("export_markers_symbolizer", &export_markers_symbolizer, m);
+    timed_export("export_polygon_pattern_symbolizer", &export_polygon_pattern_symbolizer, m);
+    timed_export("export_line_pattern_symbolizer", &export_line_pattern_symbolizer, m);
+    timed_export("export_raster_symbolizer", &export_raster_symbolizer, m);
+    timed_export("export_raster_colorizer", &export_raster_colorizer, m);
+    timed_export("export_scaling_method", &export_scaling_method, m);
+    timed_export("export_label_collision_detector", &export_label_collision_detector, m);
+    timed_export("export_dot_symbolizer", &export_dot_symbolizer, m);
+    timed_export("export_shield_symbolizer", &export_shield_symbolizer, m);
+    timed_export("export_group_symbolizer", &export_group_symbolizer, m);
+    timed_export("export_building_symbolizer", &export_building_symbolizer, m);
 
     //
     m.def("version", &mapnik_version,"Get the Mapnik version number");
@@ -687,6 +764,8 @@ PYBIND11_MODULE(_mapnik, m) {
     m.def("has_svg_renderer", &has_svg_renderer, "Get svg_renderer status");
     m.def("has_grid_renderer", &has_grid_renderer, "Get grid_renderer status");
     m.def("has_cairo", &has_cairo, "Get cairo library status");
+    m.def("_module_init_profile", &module_init_profile,
+          "List of (export function, seconds) timed while initialising this module");
 
     m.def("load_map", &load_map,
           py::arg("Map"),
@@ -832,6 +911,30 @@ PYBIND11_MODULE(_mapnik, m) {
         );
 #endif
 
+    m.def("render_metatile", &render_metatile,
+          "\n"
+          "Render Map once into a metatile Image and split it into\n"
+          "tiles_per_side x tiles_per_side tiles of tile_size pixels,\n"
+          "encoded with the given format on a pool of threads.\n"
+          "Returns a dict mapping (column, row) to the encoded tile.\n"
+          "threads=0 uses one thread per core.\n"
+          "\n"
+          "Usage:\n"
+          ">>> from mapnik import Map, Image, render_metatile, load_map\n"
+          ">>> m = Map(2048, 2048)\n"
+          ">>> load_map(m,'mapfile.xml')\n"
+          ">>> im = Image(m.width, m.height)\n"
+          ">>> tiles = render_metatile(m, im, 8, 256, 'png8')\n"
+          ">>> tiles[(0, 0)]\n"
+          "b'\\x89PNG...'\n",
+          py::arg("map"),
+          py::arg("image"),
+          py::arg("tiles_per_side"),
+          py::arg("tile_size"),
+          py::arg("format") = "png",
+          py::arg("scale_factor") = 1.0,
+          py::arg("threads") = 0);
+
     m.def("render_layer", &render_layer2,
           py::arg("map"),
           py::arg("image"),
@@ -961,7 +1064,6 @@ PYBIND11_MODULE(_mapnik, m) {
 // void export_font_engine();
 // void export_projection();
 // void export_proj_transform();
-// void export_view_transform();
 // void export_raster_colorizer();
 // void export_label_collision_detector();
 // void export_logger();
@@ -1126,7 +1228,6 @@ PYBIND11_MODULE(_mapnik, m) {
 //     export_font_engine();
 //     export_projection();
 //     export_proj_transform();
-//     export_view_transform();
 //     export_coord();
 //     export_map();
 //     export_raster_colorizer();
@@ -20,27 +20,21 @@
  *
  *****************************************************************************/
 
-#include <mapnik/config.hpp>
-
-#pragma GCC diagnostic push
-#include <mapnik/warning_ignore.hpp>
-#include <boost/python.hpp>
-#pragma GCC diagnostic pop
-
 // mapnik
+#include <mapnik/config.hpp>
+#include <mapnik/coord.hpp>
+#include <mapnik/geometry/box2d.hpp>
 #include <mapnik/view_transform.hpp>
+// stl
+#include <sstream>
+#include <stdexcept>
+//pybind11
+#include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
 
-using mapnik::view_transform;
+namespace py = pybind11;
 
-struct view_transform_pickle_suite : boost::python::pickle_suite
-{
-    static boost::python::tuple
-    getinitargs(const view_transform& c)
-    {
-        using namespace boost::python;
-        return boost::python::make_tuple(c.width(),c.height(),c.extent());
-    }
-};
+using mapnik::view_transform;
 
 namespace {
 
@@ -67,22 +61,98 @@ mapnik::box2d<double> backward_envelope(mapnik::view_transform const& t, mapnik:
 {
     return t.backward(in);
 }
+
+using coord_array = py::array_t<double, py::array::c_style>;
+
+// Converts `count` points whose coordinates are `stride` doubles apart, in place
+void transform_points(view_transform const& t, bool forward, double* x, double* y,
+                      std::size_t count, std::size_t stride)
+{
+    py::gil_scoped_release release;
+    for (std::size_t i = 0; i < count; ++i)
+    {
+        if (forward) t.forward(x + i * stride, y + i * stride);
+        else t.backward(x + i * stride, y + i * stride);
+    }
+}
+
+void transform_xy(view_transform const& t, bool forward, coord_array & x, coord_array & y)
+{
+    if (x.ndim() != 1 || y.ndim() != 1 || x.size() != y.size())
+    {
+        std::ostringstream s;
+        s << "x and y must be one dimensional arrays of the same length, got "
+          << x.size() << " and " << y.size() << " values";
+        throw std::runtime_error(s.str());
+    }
+    transform_points(t, forward, x.mutable_data(), y.mutable_data(), static_cast<std::size_t>(x.size()), 1);
+}
+
+void transform_interleaved(view_transform const& t, bool forward, coord_array & xy)
+{
+    bool flat = xy.ndim() == 1 && xy.size() % 2 == 0;
+    if (!flat && !(xy.ndim() == 2 && xy.shape(1) == 2))
+    {
+        throw std::runtime_error("expected an (N, 2) array or a flat array of interleaved x, y values");
+    }
+    double* data = xy.mutable_data();
+    transform_points(t, forward, data, data + 1, static_cast<std::size_t>(xy.size() / 2), 2);
+}
+
+void forward_xy(view_transform const& t, coord_array x, coord_array y)
+{
+    transform_xy(t, true, x, y);
+}
+
+void backward_xy(view_transform const& t, coord_array x, coord_array y)
+{
+    transform_xy(t, false, x, y);
+}
+
+void forward_interleaved(view_transform const& t, coord_array xy)
+{
+    transform_interleaved(t, true, xy);
+}
+
+void backward_interleaved(view_transform const& t, coord_array xy)
+{
+    transform_interleaved(t, false, xy);
+}
+
 }
 
-void export_view_transform()
+void export_view_transform(py::module const& m)
 {
-    using namespace boost::python;
     using mapnik::box2d;
-    using mapnik::coord2d;
 
-    class_<view_transform>("ViewTransform",init<int,int,box2d<double> const& > (
-                               "Create a ViewTransform with a width and height as integers and extent"))
-        .def_pickle(view_transform_pickle_suite())
+    py::class_<view_transform>(m, "ViewTransform")
+        .def(py::init<int, int, box2d<double> const&>(),
+             "Create a ViewTransform with a width and height as integers and extent",
+             py::arg("width"), py::arg("height"), py::arg("extent"))
+        .def(py::pickle(
+                 [] (view_transform const& t) { // __getstate__
+                     return py::make_tuple(t.width(), t.height(), t.extent());
+                 },
+                 [] (py::tuple t) { // __setstate__
+                     if (t.size() != 3)
+                         throw std::runtime_error("Invalid state!");
+                     return view_transform(t[0].cast<int>(), t[1].cast<int>(), t[2].cast<box2d<double>>());
+                 }))
         .def("forward", forward_point)
-        .def("backward",backward_point)
+        .def("backward", backward_point)
         .def("forward", forward_envelope)
-        .def("backward",backward_envelope)
-        .def("scale_x",&view_transform::scale_x)
-        .def("scale_y",&view_transform::scale_y)
+        .def("backward", backward_envelope)
+        .def("forward", forward_xy, py::arg("x").noconvert(), py::arg("y").noconvert(),
+             "Converts float64 arrays of map x and y to pixel coordinates, in place")
+        .def("backward", backward_xy, py::arg("x").noconvert(), py::arg("y").noconvert(),
+             "Converts float64 arrays of pixel x and y to map coordinates, in place")
+        .def("forward", forward_interleaved, py::arg("xy").noconvert(),
+             "Converts an (N, 2) or flat interleaved float64 array of map coordinates\n"
+             "to pixel coordinates, in place")
+        .def("backward", backward_interleaved, py::arg("xy").noconvert(),
+             "Converts an (N, 2) or flat interleaved float64 array of pixel coordinates\n"
+             "to map coordinates, in place")
+        .def("scale_x", &view_transform::scale_x)
+        .def("scale_y", &view_transform::scale_y)
         ;
 }
@@ -0,0 +1,408 @@
+/*****************************************************************************
+ *
+ * This file is part of Mapnik (c++ mapping toolkit)
+ *
+ * Copyright (C) 2024 Artem Pavlenko
+ *
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation; either
+ * version 2.1 of the License, or (at your option) any later version.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this library; if not, write to the Free Software
+ * Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+ *
+ *****************************************************************************/
+
+#ifndef MAPNIK_PYTHON_BINDING_ARROW_INCLUDED
+#define MAPNIK_PYTHON_BINDING_ARROW_INCLUDED
+
+// mapnik
+#include <mapnik/config.hpp>
+#include <mapnik/value.hpp>
+// stl
+#include <cstdint>
+#include <cstring>
+#include <string>
+#include <utility>
+#include <vector>
+
+// Arrow C data and C stream interfaces, as specified in
+// https://arrow.apache.org/docs/format/CDataInterface.html
+// https://arrow.apache.org/docs/format/CStreamInterface.html
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+#ifndef ARROW_C_DATA_INTERFACE
+#define ARROW_C_DATA_INTERFACE
+
+#define ARROW_FLAG_DICTIONARY_ORDERED 1
+#define ARROW_FLAG_NULLABLE 2
+#define ARROW_FLAG_MAP_KEYS_SORTED 4
+
+struct ArrowSchema
+{
+    // Array type description
+    const char* format;
+    const char* name;
+    const char* metadata;
+    int64_t flags;
+    int64_t n_children;
+    struct ArrowSchema** children;
+    struct ArrowSchema* dictionary;
+
+    // Release callback
+    void (*release)(struct ArrowSchema*);
+    // Opaque producer-specific data
+    void* private_data;
+};
+
+struct ArrowArray
+{
+    // Array data description
+    int64_t length;
+    int64_t null_count;
+    int64_t offset;
+    int64_t n_buffers;
+    int64_t n_children;
+    const void** buffers;
+    struct ArrowArray** children;
+    struct ArrowArray* dictionary;
+
+    // Release callback
+    void (*release)(struct ArrowArray*);
+    // Opaque producer-specific data
+    void* private_data;
+};
+
+#endif  // ARROW_C_DATA_INTERFACE
+
+#ifndef ARROW_C_STREAM_INTERFACE
+#define ARROW_C_STREAM_INTERFACE
+
+struct ArrowArrayStream
+{
+    int (*get_schema)(struct ArrowArrayStream*, struct ArrowSchema* out);
+    int (*get_next)(struct ArrowArrayStream*, struct ArrowArray* out);
+    const char* (*get_last_error)(struct ArrowArrayStream*);
+
+    // Release callback
+    void (*release)(struct ArrowArrayStream*);
+    // Opaque producer-specific data
+    void* private_data;
+};
+
+#endif  // ARROW_C_STREAM_INTERFACE
+
+#ifdef __cplusplus
+}
+#endif
+
+namespace mapnik { namespace arrow {
+
+enum class column_type
+{
+    int64,
+    float64,
+    boolean,
+    utf8,
+    binary
+};
+
+// large (64-bit offset) variants for strings and binaries so a batch never overflows
+inline char const* format_string(column_type type)
+{
+    switch (type)
+    {
+    case column_type::int64: return "l";
+    case column_type::float64: return "g";
+    case column_type::boolean: return "b";
+    case column_type::utf8: return "U";
+    case column_type::binary: return "Z";
+    }
+    return "n";
+}
+
+inline bool get_bit(std::uint8_t const* bits, std::int64_t i)
+{
+    return (bits[i >> 3] >> (i & 7)) & 1;
+}
+
+inline void set_bit(std::vector<std::uint8_t> & bits, std::int64_t i, bool value)
+{
+    std::size_t byte = static_cast<std::size_t>(i >> 3);
+    if (byte >= bits.size()) bits.resize(byte + 1, 0);
+    if (value) bits[byte] |= static_cast<std::uint8_t>(1 << (i & 7));
+    else bits[byte] &= static_cast<std::uint8_t>(~(1 << (i & 7)));
+}
+
+// key/value metadata in the binary layout of ArrowSchema::metadata
+inline std::string encode_metadata(std::vector<std::pair<std::string, std::string>> const& items)
+{
+    std::string out;
+    auto put_int32 = [&out](std::size_t value) {
+        std::int32_t v = static_cast<std::int32_t>(value);
+        out.append(reinterpret_cast<char const*>(&v), sizeof(v));
+    };
+    put_int32(items.size());
+    for (auto const& item : items)
+    {
+        put_int32(item.first.size());
+        out += item.first;
+        put_int32(item.second.size());
+        out += item.second;
+    }
+    return out;
+}
+
+struct schema_private
+{
+    std::string format;
+    std::string name;
+    std::string metadata;
+    std::vector<ArrowSchema*> children;
+};
+
+inline void release_schema(ArrowSchema* schema)
+{
+    auto* priv = static_cast<schema_private*>(schema->private_data);
+    for (ArrowSchema* child : priv->children)
+    {
+        // a consumer may have moved the child out, leaving it released
+        if (child->release) child->release(child);
+        delete child;
+    }
+    delete priv;
+    schema->release = nullptr;
+}
+
+inline void init_schema(ArrowSchema* out, std::string const& format, std::string const& name,
+                        std::string const& metadata = std::string(),
+                        std::int64_t flags = ARROW_FLAG_NULLABLE)
+{
+    auto* priv = new schema_private{format, name, metadata, {}};
+    out->format = priv->format.c_str();
+    out->name = priv->name.c_str();
+    out->metadata = priv->metadata.empty() ? nullptr : priv->metadata.data();
+    out->flags = flags;
+    out->n_children = 0;
+    out->children = nullptr;
+    out->dictionary = nullptr;
+    out->release = &release_schema;
+    out->private_data = priv;
+}
+
+// appends a new child schema to a struct ("+s") schema and returns it for init_schema
+inline ArrowSchema* add_child(ArrowSchema* parent)
+{
+    auto* priv = static_cast<schema_private*>(parent->private_data);
+    priv->children.push_back(new ArrowSchema());
+    parent->n_children = static_cast<std::int64_t>(priv->children.size());
+    parent->children = priv->children.data();
+    return priv->children.back();
+}
+
+struct array_private
+{
+    std::vector<std::vector<std::uint8_t>> storage;
+    std::vector<void const*> buffers;
+    std::vector<ArrowArray*> children;
+};
+
+inline void release_array(ArrowArray* array)
+{
+    auto* priv = static_cast<array_private*>(array->private_data);
+    for (ArrowArray* child : priv->children)
+    {
+        if (child->release) child->release(child);
+        delete child;
+    }
+    delete priv;
+    array->release = nullptr;
+}
+
+// struct array of the given length taking ownership of children
+inline void init_struct_array(ArrowArray* out, std::int64_t length, std::vector<ArrowArray*> children)
+{
+    auto* priv = new array_private;
+    priv->buffers.push_back(nullptr);
+    priv->children = std::move(children);
+    out->length = length;
+    out->null_count = 0;
+    out->offset = 0;
+    out->n_buffers = 1;
+    out->n_children = static_cast<std::int64_t>(priv->children.size());
+    out->buffers = priv->buffers.data();
+    out->children = priv->children.data();
+    out->dictionary = nullptr;
+    out->release = &release_array;
+    out->private_data = priv;
+}
+
+// Accumulates the values of one column and hands them over as an ArrowArray.
+// Pure C++, safe to use without the GIL.
+class column_builder
+{
+  public:
+    explicit column_builder(column_type type)
+        : type_(type)
+    {
+        reset();
+    }
+
+    column_type type() const { return type_; }
+
+    void append_null()
+    {
+        set_bit(validity_, length_, false);
+        ++null_count_;
+        switch (type_)
+        {
+        case column_type::int64:
+        case column_type::float64:
+            data_.resize(data_.size() + 8, 0);
+            break;
+        case column_type::boolean:
+            set_bit(data_, length_, false);
+            break;
+        default:
+            append_offset();
+            break;
+        }
+        ++length_;
+    }
+
+    void append_int64(std::int64_t value)
+    {
+        append_raw(data_, &value, sizeof(value));
+        valid();
+    }
+
+    void append_float64(double value)
+    {
+        append_raw(data_, &value, sizeof(value));
+        valid();
+    }
+
+    void append_boolean(bool value)
+    {
+        set_bit(data_, length_, value);
+        valid();
+    }
+
+    void append_bytes(char const* data, std::size_t size)
+    {
+        append_raw(data_, data, size);
+        append_offset();
+        valid();
+    }
+
+    // Appends a feature attribute. Integers fit float64 columns and every value
+    // fits utf8 and binary ones (as its string); returns false, appending nothing,
+    // for a value that does not fit the column type.
+    bool append(value const& v)
+    {
+        if (v.is_null())
+        {
+            append_null();
+            return true;
+        }
+        switch (type_)
+        {
+        case column_type::int64:
+            if (!v.is<value_integer>()) return false;
+            append_int64(v.get<value_integer>());
+            break;
+        case column_type::float64:
+            if (!v.is<value_integer>() && !v.is<value_double>()) return false;
+            append_float64(v.to_double());
+            break;
+        case column_type::boolean:
+            if (!v.is<value_bool>()) return false;
+            append_boolean(v.get<value_bool>());
+            break;
+        default:
+        {
+            std::string s = v.to_string();
+            append_bytes(s.data(), s.size());
+            break;
+        }
+        }
+        return true;
+    }
+
+    // moves the accumulated values into out and starts a new array
+    void finish(ArrowArray* out)
+    {
+        auto* priv = new array_private;
+        bool var_size = type_ == column_type::utf8 || type_ == column_type::binary;
+        priv->storage.push_back(std::move(validity_));
+        if (var_size) priv->storage.push_back(std::move(offsets_));
+        priv->storage.push_back(std::move(data_));
+        for (std::size_t i = 0; i < priv->storage.size(); ++i)
+        {
+            auto & buffer = priv->storage[i];
+            // consumers expect non-null value buffers even for empty arrays
+            if (buffer.empty()) buffer.push_back(0);
+            priv->buffers.push_back((i == 0 && null_count_ == 0) ? nullptr : buffer.data());
+        }
+        out->length = length_;
+        out->null_count = null_count_;
+        out->offset = 0;
+        out->n_buffers = static_cast<std::int64_t>(priv->buffers.size());
+        out->n_children = 0;
+        out->buffers = priv->buffers.data();
+        out->children = nullptr;
+        out->dictionary = nullptr;
+        out->release = &release_array;
+        out->private_data = priv;
+        reset();
+    }
+
+  private:
+    static void append_raw(std::vector<std::uint8_t> & buffer, void const* data, std::size_t size)
+    {
+        auto const* bytes = static_cast<std::uint8_t const*>(data);
+        buffer.insert(buffer.end(), bytes, bytes + size);
+    }
+
+    void append_offset()
+    {
+        std::int64_t offset = static_cast<std::int64_t>(data_.size());
+        append_raw(offsets_, &offset, sizeof(offset));
+    }
+
+    void valid()
+    {
+        set_bit(validity_, length_, true);
+        ++length_;
+    }
+
+    void reset()
+    {
+        length_ = 0;
+        null_count_ = 0;
+        validity_ = std::vector<std::uint8_t>();
+        data_ = std::vector<std::uint8_t>();
+        offsets_ = std::vector<std::uint8_t>();
+        if (type_ == column_type::utf8 || type_ == column_type::binary) append_offset();
+    }
+
+    column_type type_;
+    std::int64_t length_ = 0;
+    std::int64_t null_count_ = 0;
+    std::vector<std::uint8_t> validity_;
+    std::vector<std::uint8_t> data_;
+    std::vector<std::uint8_t> offsets_;
+};
+
+}} // namespace mapnik::arrow
+
+#endif // MAPNIK_PYTHON_BINDING_ARROW_INCLUDED
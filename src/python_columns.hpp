@@ -0,0 +1,375 @@
+/*****************************************************************************
+ *
+ * This file is part of Mapnik (c++ mapping toolkit)
+ *
+ * Copyright (C) 2024 Artem Pavlenko
+ *
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation; either
+ * version 2.1 of the License, or (at your option) any later version.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this library; if not, write to the Free Software
+ * Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+ *
+ *****************************************************************************/
+
+#ifndef MAPNIK_PYTHON_BINDING_COLUMNS_INCLUDED
+#define MAPNIK_PYTHON_BINDING_COLUMNS_INCLUDED
+
+// mapnik
+#include <mapnik/config.hpp>
+#include <mapnik/feature.hpp>
+#include <mapnik/datasource.hpp>
+#include <mapnik/feature_layer_desc.hpp>
+#include <mapnik/query.hpp>
+#include <mapnik/value.hpp>
+#include <mapnik/util/geometry_to_wkb.hpp>
+#include "mapnik_value_converter.hpp"
+#include "python_to_value.hpp"
+// stl
+#include <algorithm>
+#include <cstdint>
+#include <cstring>
+#include <limits>
+#include <optional>
+#include <sstream>
+#include <stdexcept>
+#include <string>
+#include <utility>
+#include <vector>
+//pybind11
+#include <pybind11/pybind11.h>
+#include <pybind11/numpy.h>
+
+namespace mapnik {
+
+namespace py = pybind11;
+
+// Attributes, ids, envelopes and WKB geometries of a run of features,
+// stored column by column. Filled without the GIL, see read_columns.
+struct feature_columns
+{
+    feature_columns() = default;
+    explicit feature_columns(std::vector<std::string> const& names_)
+        : names(names_),
+          values(names_.size()) {}
+
+    std::size_t size() const { return ids.size(); }
+
+    void append(feature_impl & feature)
+    {
+        if (names.empty() && ids.empty())
+        {
+            // no field list given: use the attributes of the first feature, in context order
+            std::vector<std::pair<std::size_t, std::string>> ordered;
+            for (auto const& item : *feature.context())
+            {
+                ordered.emplace_back(item.second, item.first);
+            }
+            std::sort(ordered.begin(), ordered.end());
+            for (auto const& item : ordered) names.push_back(item.second);
+            values.resize(names.size());
+        }
+        ids.push_back(feature.id());
+        box2d<double> box = feature.envelope();
+        if (box.valid())
+        {
+            envelopes.insert(envelopes.end(), {box.minx(), box.miny(), box.maxx(), box.maxy()});
+        }
+        else
+        {
+            envelopes.insert(envelopes.end(), 4, std::numeric_limits<double>::quiet_NaN());
+        }
+        util::wkb_buffer_ptr buffer = util::to_wkb(feature.get_geometry(), wkbNDR);
+        if (buffer) wkb.emplace_back(buffer->buffer(), buffer->size());
+        else wkb.emplace_back();
+        for (std::size_t i = 0; i < names.size(); ++i)
+        {
+            values[i].push_back(feature.get(names[i]));
+        }
+    }
+
+    std::vector<std::string> names;
+    std::vector<value_integer> ids;
+    std::vector<double> envelopes; // minx, miny, maxx, maxy per feature
+    std::vector<std::string> wkb;
+    std::vector<std::vector<value>> values; // one column per name
+};
+
+// Appends up to max_features features (0 means all) and returns the number read.
+// Does not touch Python objects: call with the GIL released.
+inline std::size_t read_columns(Featureset & fs, feature_columns & columns, std::size_t max_features = 0)
+{
+    std::size_t count = 0;
+    while (max_features == 0 || count < max_features)
+    {
+        feature_ptr feature = fs.next();
+        if (!feature) break;
+        columns.append(*feature);
+        ++count;
+    }
+    return count;
+}
+
+// Fields exported by Datasource.to_columns/to_arrow: `fields` if given, else the
+// property names of the query, else every field of the layer descriptor, with
+// their declared layer_descriptor types (0 when unknown).
+struct exported_fields
+{
+    std::vector<std::string> names;
+    std::vector<unsigned> types;
+};
+
+// Resolves the exported fields and adds them to the property names of `q`
+inline exported_fields resolve_fields(layer_descriptor const& ld, query & q,
+                                      std::optional<std::vector<std::string>> const& fields)
+{
+    std::vector<attribute_descriptor> const& desc_ar = ld.get_descriptors();
+    exported_fields result;
+    if (fields)
+    {
+        result.names = *fields;
+    }
+    else if (!q.property_names().empty())
+    {
+        result.names.assign(q.property_names().begin(), q.property_names().end());
+    }
+    else
+    {
+        for (auto const& desc : desc_ar) result.names.push_back(desc.get_name());
+    }
+    for (auto const& name : result.names)
+    {
+        q.add_property_name(name);
+        auto itr = std::find_if(desc_ar.begin(), desc_ar.end(),
+                                [&name](attribute_descriptor const& desc) { return desc.get_name() == name; });
+        result.types.push_back(itr != desc_ar.end() ? itr->get_type() : 0);
+    }
+    return result;
+}
+
+// Logical type of an exported column, the same for NumPy and Arrow exports
+enum class column_kind
+{
+    integer,
+    floating,
+    boolean,
+    string
+};
+
+inline column_kind value_kind(value const& v)
+{
+    if (v.is<value_integer>()) return column_kind::integer;
+    if (v.is<value_double>()) return column_kind::floating;
+    if (v.is<value_bool>()) return column_kind::boolean;
+    return column_kind::string;
+}
+
+// Smallest kind holding the values of `kind` and v: integers and floats widen
+// to floating, any other mismatch to string. Nulls fit every kind.
+inline column_kind widen_column_kind(column_kind kind, value const& v)
+{
+    if (v.is_null()) return kind;
+    column_kind other = value_kind(v);
+    if (other == kind || kind == column_kind::string) return kind;
+    if ((kind == column_kind::integer && other == column_kind::floating) ||
+        (kind == column_kind::floating && other == column_kind::integer))
+    {
+        return column_kind::floating;
+    }
+    return column_kind::string;
+}
+
+// The declared type if any, else the kind of the first non null value, widened
+// to hold every value of the column. Columns of nulls only hold strings.
+inline column_kind infer_column_kind(std::vector<value> const& column, unsigned declared_type)
+{
+    std::optional<column_kind> kind;
+    switch (declared_type)
+    {
+    case Integer: kind = column_kind::integer; break;
+    case Float:
+    case Double: kind = column_kind::floating; break;
+    case Boolean: kind = column_kind::boolean; break;
+    case String: kind = column_kind::string; break;
+    default: break;
+    }
+    for (auto const& v : column)
+    {
+        if (v.is_null()) continue;
+        kind = kind ? widen_column_kind(*kind, v) : value_kind(v);
+    }
+    return kind ? *kind : column_kind::string;
+}
+
+namespace detail {
+
+inline py::array object_array(std::size_t size)
+{
+    return py::array(py::dtype("object"), std::vector<py::ssize_t>{static_cast<py::ssize_t>(size)});
+}
+
+inline void set_object(py::array & array, std::size_t index, py::object obj)
+{
+    PyObject** data = static_cast<PyObject**>(array.mutable_data());
+    PyObject* old = data[index];
+    data[index] = obj.release().ptr();
+    Py_XDECREF(old);
+}
+
+// int64 and bool arrays cannot hold nulls: such columns become object arrays,
+// as do string columns. Float64 columns store nulls as NaN.
+inline py::array column_to_array(std::vector<value> const& column, unsigned declared_type)
+{
+    std::size_t size = column.size();
+    bool has_null = std::any_of(column.begin(), column.end(), [](value const& v) { return v.is_null(); });
+    column_kind kind = infer_column_kind(column, declared_type);
+    if (kind == column_kind::integer && !has_null)
+    {
+        py::array_t<std::int64_t> array(size);
+        auto out = array.mutable_unchecked<1>();
+        for (std::size_t i = 0; i < size; ++i) out(i) = column[i].get<value_integer>();
+        return std::move(array);
+    }
+    if (kind == column_kind::floating)
+    {
+        py::array_t<double> array(size);
+        auto out = array.mutable_unchecked<1>();
+        for (std::size_t i = 0; i < size; ++i)
+        {
+            out(i) = column[i].is_null() ? std::numeric_limits<double>::quiet_NaN() : column[i].to_double();
+        }
+        return std::move(array);
+    }
+    if (kind == column_kind::boolean && !has_null)
+    {
+        py::array_t<bool> array(size);
+        auto out = array.mutable_unchecked<1>();
+        for (std::size_t i = 0; i < size; ++i) out(i) = column[i].get<value_bool>();
+        return std::move(array);
+    }
+    py::array array = object_array(size);
+    for (std::size_t i = 0; i < size; ++i) set_object(array, i, py::cast(column[i]));
+    return array;
+}
+
+} // namespace detail
+
+// Converts columns into a dict of NumPy arrays:
+//   "id": int64 (N,), "envelope": float64 (N, 4), "wkb": object (N,) of bytes,
+//   "fields": {name: int64 | float64 | bool | object array}
+// declared_types optionally holds the layer_descriptor type of each name.
+inline py::dict columns_to_python(feature_columns const& columns,
+                                  std::vector<unsigned> const& declared_types = {})
+{
+    std::size_t size = columns.size();
+    py::dict result;
+    py::array_t<std::int64_t> ids(size);
+    if (size > 0) std::memcpy(ids.mutable_data(), columns.ids.data(), size * sizeof(std::int64_t));
+    result["id"] = ids;
+    py::array_t<double> envelopes(std::vector<py::ssize_t>{static_cast<py::ssize_t>(size), 4});
+    if (size > 0) std::memcpy(envelopes.mutable_data(), columns.envelopes.data(), size * 4 * sizeof(double));
+    result["envelope"] = envelopes;
+    py::array wkb = detail::object_array(size);
+    for (std::size_t i = 0; i < size; ++i)
+    {
+        detail::set_object(wkb, i, py::bytes(columns.wkb[i]));
+    }
+    result["wkb"] = wkb;
+    py::dict fields;
+    for (std::size_t i = 0; i < columns.names.size(); ++i)
+    {
+        unsigned type = i < declared_types.size() ? declared_types[i] : 0;
+        fields[py::str(columns.names[i])] = detail::column_to_array(columns.values[i], type);
+    }
+    result["fields"] = fields;
+    return result;
+}
+
+// Converts a Python column (one dimensional NumPy array or any iterable) of `size`
+// values into mapnik values. Numeric and boolean arrays are read directly from
+// their buffer, NumPy scalars are converted with item().
+inline std::vector<value> values_from_python(py::handle const& column, std::size_t size, std::string const& name)
+{
+    std::vector<value> values;
+    values.reserve(size);
+    bool is_array = py::isinstance<py::array>(column);
+    if (is_array && py::reinterpret_borrow<py::array>(column).ndim() != 1)
+    {
+        std::ostringstream s;
+        s << "column '" << name << "' must be a one dimensional array";
+        throw std::runtime_error(s.str());
+    }
+    char kind = is_array ? py::reinterpret_borrow<py::array>(column).dtype().kind() : 'O';
+    if (kind == 'i')
+    {
+        auto array = py::array_t<std::int64_t, py::array::c_style | py::array::forcecast>::ensure(column);
+        if (!array) throw py::error_already_set();
+        for (py::ssize_t i = 0; i < array.size(); ++i) values.emplace_back(static_cast<value_integer>(array.data()[i]));
+    }
+    else if (kind == 'u')
+    {
+        auto array = py::array_t<std::uint64_t, py::array::c_style | py::array::forcecast>::ensure(column);
+        if (!array) throw py::error_already_set();
+        for (py::ssize_t i = 0; i < array.size(); ++i)
+        {
+            std::uint64_t v = array.data()[i];
+            if (v > static_cast<std::uint64_t>(std::numeric_limits<value_integer>::max()))
+            {
+                std::ostringstream s;
+                s << "column '" << name << "' value " << v << " at index " << i
+                  << " does not fit a 64-bit signed integer";
+                throw std::runtime_error(s.str());
+            }
+            values.emplace_back(static_cast<value_integer>(v));
+        }
+    }
+    else if (kind == 'f')
+    {
+        auto array = py::array_t<double, py::array::c_style | py::array::forcecast>::ensure(column);
+        if (!array) throw py::error_already_set();
+        for (py::ssize_t i = 0; i < array.size(); ++i) values.emplace_back(array.data()[i]);
+    }
+    else if (kind == 'b')
+    {
+        auto array = py::array_t<bool, py::array::c_style | py::array::forcecast>::ensure(column);
+        if (!array) throw py::error_already_set();
+        for (py::ssize_t i = 0; i < array.size(); ++i) values.emplace_back(static_cast<value_bool>(array.data()[i]));
+    }
+    else
+    {
+        transcoder tr("utf8");
+        for (auto item : column)
+        {
+            // NumPy scalars that are not Python str/int/float/bool subclasses
+            bool builtin = py::isinstance<py::str>(item) || py::isinstance<py::int_>(item) ||
+                           py::isinstance<py::float_>(item) || py::isinstance<py::bool_>(item);
+            if (!builtin && py::hasattr(item, "dtype") && py::hasattr(item, "item"))
+            {
+                values.push_back(python_to_value(item.attr("item")(), tr));
+            }
+            else
+            {
+                values.push_back(python_to_value(item, tr));
+            }
+        }
+    }
+    if (values.size() != size)
+    {
+        std::ostringstream s;
+        s << "column '" << name << "' has " << values.size() << " values, expected " << size;
+        throw std::runtime_error(s.str());
+    }
+    return values;
+}
+
+} // namespace mapnik
+
+#endif // MAPNIK_PYTHON_BINDING_COLUMNS_INCLUDED
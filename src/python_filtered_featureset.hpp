@@ -0,0 +1,82 @@
+/*****************************************************************************
+ *
+ * This file is part of Mapnik (c++ mapping toolkit)
+ *
+ * Copyright (C) 2024 Artem Pavlenko
+ *
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation; either
+ * version 2.1 of the License, or (at your option) any later version.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this library; if not, write to the Free Software
+ * Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+ *
+ *****************************************************************************/
+
+#ifndef MAPNIK_PYTHON_BINDING_FILTERED_FEATURESET_INCLUDED
+#define MAPNIK_PYTHON_BINDING_FILTERED_FEATURESET_INCLUDED
+
+// mapnik
+#include <mapnik/config.hpp>
+#include <mapnik/attribute.hpp>
+#include <mapnik/datasource.hpp>
+#include <mapnik/expression.hpp>
+#include <mapnik/expression_evaluator.hpp>
+#include <mapnik/feature.hpp>
+#include <mapnik/value.hpp>
+#include <mapnik/util/variant.hpp>
+// stl
+#include <cstddef>
+#include <memory>
+#include <utility>
+
+namespace mapnik {
+
+// Featureset passing on the features of `source` for which `filter` is true,
+// up to `limit` features (0 means no limit). A null filter matches everything.
+// Evaluation is pure C++, next() does not need the GIL.
+class filtered_featureset : public Featureset
+{
+  public:
+    filtered_featureset(featureset_ptr source, expression_ptr filter,
+                        attributes variables = attributes(), std::size_t limit = 0)
+        : source_(std::move(source)),
+          filter_(std::move(filter)),
+          variables_(std::move(variables)),
+          limit_(limit),
+          count_(0) {}
+
+    feature_ptr next() override
+    {
+        if (!source_ || (limit_ > 0 && count_ >= limit_)) return feature_ptr();
+        while (feature_ptr feature = source_->next())
+        {
+            if (!filter_ || util::apply_visitor(evaluate<feature_impl, value, attributes>(*feature, variables_),
+                                                *filter_).to_bool())
+            {
+                ++count_;
+                return feature;
+            }
+        }
+        source_.reset();
+        return feature_ptr();
+    }
+
+  private:
+    featureset_ptr source_;
+    expression_ptr filter_;
+    attributes variables_;
+    std::size_t limit_;
+    std::size_t count_;
+};
+
+} // namespace mapnik
+
+#endif // MAPNIK_PYTHON_BINDING_FILTERED_FEATURESET_INCLUDED
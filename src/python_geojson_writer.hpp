@@ -0,0 +1,74 @@
+/*****************************************************************************
+ *
+ * This file is part of Mapnik (c++ mapping toolkit)
+ *
+ * Copyright (C) 2024 Artem Pavlenko
+ *
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation; either
+ * version 2.1 of the License, or (at your option) any later version.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this library; if not, write to the Free Software
+ * Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+ *
+ *****************************************************************************/
+
+#ifndef MAPNIK_PYTHON_BINDING_GEOJSON_WRITER_INCLUDED
+#define MAPNIK_PYTHON_BINDING_GEOJSON_WRITER_INCLUDED
+
+// mapnik
+#include <mapnik/config.hpp>
+#include <mapnik/feature.hpp>
+#include <mapnik/util/feature_to_geojson.hpp>
+// stl
+#include <stdexcept>
+#include <string>
+
+namespace mapnik {
+
+// Appends features to a GeoJSON FeatureCollection held in `buffer`.
+// The buffer may be drained (e.g. written out and cleared) between features.
+class geojson_collection_writer
+{
+  public:
+    explicit geojson_collection_writer(std::string & buffer)
+        : buffer_(buffer),
+          count_(0)
+    {
+        buffer_ += "{\"type\":\"FeatureCollection\",\"features\":[";
+    }
+
+    void add(feature_impl const& feature)
+    {
+        if (count_++ > 0) buffer_ += ',';
+        if (!util::to_geojson(feature_json_, feature))
+        {
+            throw std::runtime_error("Failed to generate GeoJSON");
+        }
+        buffer_ += feature_json_;
+        feature_json_.clear();
+    }
+
+    void close()
+    {
+        buffer_ += "]}";
+    }
+
+    std::size_t count() const { return count_; }
+
+  private:
+    std::string & buffer_;
+    std::string feature_json_;
+    std::size_t count_;
+};
+
+} // namespace mapnik
+
+#endif // MAPNIK_PYTHON_BINDING_GEOJSON_WRITER_INCLUDED
@@ -0,0 +1,194 @@
+/*****************************************************************************
+ *
+ * This file is part of Mapnik (c++ mapping toolkit)
+ *
+ * Copyright (C) 2024 Artem Pavlenko
+ *
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation; either
+ * version 2.1 of the License, or (at your option) any later version.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this library; if not, write to the Free Software
+ * Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+ *
+ *****************************************************************************/
+
+#ifndef MAPNIK_PYTHON_BINDING_MEMORY_DATASOURCE_INCLUDED
+#define MAPNIK_PYTHON_BINDING_MEMORY_DATASOURCE_INCLUDED
+
+// mapnik
+#include <mapnik/config.hpp>
+#include <mapnik/datasource.hpp>
+#include <mapnik/feature.hpp>
+#include <mapnik/memory_datasource.hpp>
+#include <mapnik/geometry/box2d.hpp>
+#include <mapnik/warning.hpp>
+MAPNIK_DISABLE_WARNING_PUSH
+#include <mapnik/warning_ignore.hpp>
+#include <boost/geometry/geometries/box.hpp>
+#include <boost/geometry/geometries/point.hpp>
+#include <boost/geometry/index/rtree.hpp>
+MAPNIK_DISABLE_WARNING_POP
+// stl
+#include <algorithm>
+#include <iterator>
+#include <memory>
+#include <mutex>
+#include <utility>
+#include <vector>
+
+namespace mapnik {
+
+// Featureset over a precomputed list of features
+class vector_featureset : public Featureset
+{
+  public:
+    explicit vector_featureset(std::vector<feature_ptr> && features)
+        : features_(std::move(features)),
+          pos_(0) {}
+
+    feature_ptr next() override
+    {
+        if (pos_ < features_.size()) return features_[pos_++];
+        return feature_ptr();
+    }
+
+  private:
+    std::vector<feature_ptr> features_;
+    std::size_t pos_;
+};
+
+// memory_datasource answering queries from a packed R-tree instead of scanning
+// every feature. The tree is bulk loaded on the first query (or by build_index)
+// and dropped whenever a feature is added. Tree entries are positions in
+// indexed_features_, which is append only, so a position taken from an older
+// tree stays valid after more features are added.
+class indexed_memory_datasource : public memory_datasource
+{
+    using point_type = boost::geometry::model::point<double, 2, boost::geometry::cs::cartesian>;
+    using box_type = boost::geometry::model::box<point_type>;
+    using entry_type = std::pair<box_type, std::size_t>;
+    using rtree_type = boost::geometry::index::rtree<entry_type, boost::geometry::index::rstar<16>>;
+
+  public:
+    explicit indexed_memory_datasource(parameters const& params)
+        : memory_datasource(params),
+          bbox_check_(*params.get<boolean_type>("bbox_check", true)) {}
+
+    void add_feature(feature_ptr const& feature)
+    {
+        push(feature);
+        std::lock_guard<std::mutex> lock(mutex_);
+        indexed_features_.push_back(feature);
+        index_.reset();
+    }
+
+    // bulk load: adds the features and sets the envelope in one pass
+    void add_features(std::vector<feature_ptr> const& features)
+    {
+        box2d<double> extent;
+        if (size() > 0) extent = envelope();
+        for (auto const& feature : features)
+        {
+            box2d<double> box = feature->envelope();
+            if (box.valid())
+            {
+                if (extent.valid()) extent.expand_to_include(box);
+                else extent = box;
+            }
+            add_feature(feature);
+        }
+        if (extent.valid()) set_envelope(extent);
+    }
+
+    void build_index() const
+    {
+        index();
+    }
+
+    bool has_index() const
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        return static_cast<bool>(index_);
+    }
+
+    featureset_ptr features(query const& q) const override
+    {
+        if (!bbox_check_ || type() == datasource::Raster) return memory_datasource::features(q);
+        return query_index(q.get_bbox());
+    }
+
+    featureset_ptr features_at_point(coord2d const& pt, double tol = 0) const override
+    {
+        if (type() == datasource::Raster) return memory_datasource::features_at_point(pt, tol);
+        box2d<double> box(pt.x, pt.y, pt.x, pt.y);
+        box.pad(tol);
+        return query_index(box);
+    }
+
+  private:
+    std::shared_ptr<rtree_type const> index() const
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        if (!index_)
+        {
+            std::vector<entry_type> entries;
+            entries.reserve(indexed_features_.size());
+            for (std::size_t i = 0; i < indexed_features_.size(); ++i)
+            {
+                // features without a valid envelope never match a bbox query
+                box2d<double> box = indexed_features_[i]->envelope();
+                if (!box.valid()) continue;
+                entries.emplace_back(box_type(point_type(box.minx(), box.miny()),
+                                              point_type(box.maxx(), box.maxy())), i);
+            }
+            // the range constructor uses the packing (bulk loading) algorithm
+            index_ = std::make_shared<rtree_type const>(entries.begin(), entries.end());
+        }
+        return index_;
+    }
+
+    featureset_ptr query_index(box2d<double> const& box) const
+    {
+        std::shared_ptr<rtree_type const> index = this->index();
+        std::vector<entry_type> hits;
+        index->query(boost::geometry::index::intersects(
+                              box_type(point_type(box.minx(), box.miny()), point_type(box.maxx(), box.maxy()))),
+                          std::back_inserter(hits));
+        if (hits.empty()) return make_invalid_featureset();
+        // keep insertion order, as a linear scan would
+        std::sort(hits.begin(), hits.end(),
+                  [](entry_type const& a, entry_type const& b) { return a.second < b.second; });
+        std::vector<feature_ptr> features;
+        features.reserve(hits.size());
+        {
+            // add_feature may be growing the vector meanwhile
+            std::lock_guard<std::mutex> lock(mutex_);
+            for (auto const& hit : hits) features.push_back(indexed_features_[hit.second]);
+        }
+        return std::make_shared<vector_featureset>(std::move(features));
+    }
+
+    bool bbox_check_;
+    std::vector<feature_ptr> indexed_features_;
+    mutable std::mutex mutex_;
+    mutable std::shared_ptr<rtree_type const> index_;
+};
+
+inline std::shared_ptr<indexed_memory_datasource> make_memory_datasource()
+{
+    parameters p;
+    p.insert(std::make_pair("type", "memory"));
+    return std::make_shared<indexed_memory_datasource>(p);
+}
+
+} // namespace mapnik
+
+#endif // MAPNIK_PYTHON_BINDING_MEMORY_DATASOURCE_INCLUDED
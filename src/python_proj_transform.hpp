@@ -0,0 +1,158 @@
+/*****************************************************************************
+ *
+ * This file is part of Mapnik (c++ mapping toolkit)
+ *
+ * Copyright (C) 2024 Artem Pavlenko
+ *
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation; either
+ * version 2.1 of the License, or (at your option) any later version.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this library; if not, write to the Free Software
+ * Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+ *
+ *****************************************************************************/
+
+#ifndef MAPNIK_PYTHON_BINDING_PROJ_TRANSFORM_INCLUDED
+#define MAPNIK_PYTHON_BINDING_PROJ_TRANSFORM_INCLUDED
+
+// mapnik
+#include <mapnik/config.hpp>
+#include <mapnik/proj_transform.hpp>
+#include <mapnik/projection.hpp>
+// stl
+#include <cstddef>
+#include <list>
+#include <map>
+#include <memory>
+#include <mutex>
+#include <string>
+#include <utility>
+
+namespace mapnik {
+
+// proj_transform remembering the srs it was created from. PROJ transformations
+// are not reentrant: calls made without the GIL are serialised through `mutex`.
+struct python_proj_transform : proj_transform
+{
+    python_proj_transform(projection const& source, projection const& dest)
+        : proj_transform(source, dest),
+          source_srs(source.params()),
+          dest_srs(dest.params()) {}
+
+    std::string source_srs;
+    std::string dest_srs;
+    std::mutex mutex;
+};
+
+using python_proj_transform_ptr = std::shared_ptr<python_proj_transform>;
+
+// Process wide least recently used cache of transforms keyed by (source, dest) srs.
+// Thread safe and GIL free.
+class proj_transform_cache_lru
+{
+    using key_type = std::pair<std::string, std::string>;
+    using list_type = std::list<std::pair<key_type, python_proj_transform_ptr>>;
+
+  public:
+    struct statistics
+    {
+        std::size_t hits;
+        std::size_t misses;
+        std::size_t size;
+        std::size_t max_size;
+    };
+
+    python_proj_transform_ptr get(std::string const& source, std::string const& dest)
+    {
+        key_type key(source, dest);
+        {
+            std::lock_guard<std::mutex> lock(mutex_);
+            if (python_proj_transform_ptr cached = find(key))
+            {
+                ++hits_;
+                return cached;
+            }
+            ++misses_;
+        }
+        // PROJ initialisation is slow, do not block other lookups meanwhile
+        projection source_proj(source, true);
+        projection dest_proj(dest, true);
+        auto transform = std::make_shared<python_proj_transform>(source_proj, dest_proj);
+        std::lock_guard<std::mutex> lock(mutex_);
+        // another thread may have created the same transform in the meantime
+        if (python_proj_transform_ptr cached = find(key)) return cached;
+        if (max_size_ > 0)
+        {
+            items_.emplace_front(key, transform);
+            index_[key] = items_.begin();
+            trim();
+        }
+        return transform;
+    }
+
+    void clear()
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        items_.clear();
+        index_.clear();
+        hits_ = 0;
+        misses_ = 0;
+    }
+
+    void set_max_size(std::size_t max_size)
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        max_size_ = max_size;
+        trim();
+    }
+
+    statistics stats() const
+    {
+        std::lock_guard<std::mutex> lock(mutex_);
+        return statistics{hits_, misses_, items_.size(), max_size_};
+    }
+
+  private:
+    // call with mutex_ held
+    python_proj_transform_ptr find(key_type const& key)
+    {
+        auto itr = index_.find(key);
+        if (itr == index_.end()) return python_proj_transform_ptr();
+        items_.splice(items_.begin(), items_, itr->second);
+        return itr->second->second;
+    }
+
+    void trim()
+    {
+        while (items_.size() > max_size_)
+        {
+            index_.erase(items_.back().first);
+            items_.pop_back();
+        }
+    }
+
+    mutable std::mutex mutex_;
+    list_type items_;
+    std::map<key_type, list_type::iterator> index_;
+    std::size_t max_size_ = 64;
+    std::size_t hits_ = 0;
+    std::size_t misses_ = 0;
+};
+
+inline proj_transform_cache_lru & transform_cache()
+{
+    static proj_transform_cache_lru cache;
+    return cache;
+}
+
+} // namespace mapnik
+
+#endif // MAPNIK_PYTHON_BINDING_PROJ_TRANSFORM_INCLUDED
@@ -0,0 +1,90 @@
+/*****************************************************************************
+ *
+ * This file is part of Mapnik (c++ mapping toolkit)
+ *
+ * Copyright (C) 2024 Artem Pavlenko
+ *
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation; either
+ * version 2.1 of the License, or (at your option) any later version.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this library; if not, write to the Free Software
+ * Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+ *
+ *****************************************************************************/
+
+#ifndef MAPNIK_PYTHON_BINDING_THREAD_POOL_INCLUDED
+#define MAPNIK_PYTHON_BINDING_THREAD_POOL_INCLUDED
+
+// stl
+#include <algorithm>
+#include <atomic>
+#include <cstddef>
+#include <exception>
+#include <mutex>
+#include <thread>
+#include <vector>
+
+namespace mapnik {
+
+// Calls func(i) for every i in [0, count) using up to `threads` threads
+// (0 means one per hardware core). The calling thread takes part in the work.
+// Must not touch Python objects: call with the GIL released.
+// The first exception thrown by func is re-thrown once all threads have joined.
+template <typename Func>
+void parallel_for(std::size_t count, std::size_t threads, Func func)
+{
+    if (threads == 0)
+    {
+        threads = std::max(1u, std::thread::hardware_concurrency());
+    }
+    threads = std::min(threads, count);
+    if (threads <= 1)
+    {
+        for (std::size_t i = 0; i < count; ++i) func(i);
+        return;
+    }
+    std::atomic<std::size_t> next(0);
+    std::exception_ptr error;
+    std::mutex error_mutex;
+    auto worker = [&]() {
+        for (;;)
+        {
+            std::size_t i = next++;
+            if (i >= count) break;
+            try
+            {
+                func(i);
+            }
+            catch (...)
+            {
+                std::lock_guard<std::mutex> lock(error_mutex);
+                if (!error) error = std::current_exception();
+                next = count;
+            }
+        }
+    };
+    std::vector<std::thread> pool;
+    pool.reserve(threads - 1);
+    for (std::size_t t = 1; t < threads; ++t)
+    {
+        pool.emplace_back(worker);
+    }
+    worker();
+    for (auto & thread : pool)
+    {
+        thread.join();
+    }
+    if (error) std::rethrow_exception(error);
+}
+
+}
+
+#endif // MAPNIK_PYTHON_BINDING_THREAD_POOL_INCLUDED
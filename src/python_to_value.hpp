@@ -65,6 +65,32 @@ namespace mapnik {
         }
         return vars;
     }
+
+    // converts a single Python object like dict2attr does, None becomes a null value
+    inline mapnik::value python_to_value(py::handle const& handle, mapnik::transcoder const& tr)
+    {
+        if (handle.is_none())
+        {
+            return mapnik::value_null();
+        }
+        else if (py::isinstance<py::str>(handle))
+        {
+            return tr.transcode(handle.cast<std::string>().c_str());
+        }
+        else if (py::isinstance<py::bool_>(handle))
+        {
+            return handle.cast<mapnik::value_bool>();
+        }
+        else if (py::isinstance<py::float_>(handle))
+        {
+            return handle.cast<mapnik::value_double>();
+        }
+        else if (py::isinstance<py::int_>(handle))
+        {
+            return handle.cast<mapnik::value_integer>();
+        }
+        return tr.transcode(py::str(handle).cast<std::string>().c_str());
+    }
 }
 
 #endif // MAPNIK_PYTHON_BINDING_PYTHON_TO_VALUE
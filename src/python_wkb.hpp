@@ -0,0 +1,55 @@
+/*****************************************************************************
+ *
+ * This file is part of Mapnik (c++ mapping toolkit)
+ *
+ * Copyright (C) 2024 Artem Pavlenko
+ *
+ * This library is free software; you can redistribute it and/or
+ * modify it under the terms of the GNU Lesser General Public
+ * License as published by the Free Software Foundation; either
+ * version 2.1 of the License, or (at your option) any later version.
+ *
+ * This library is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+ * Lesser General Public License for more details.
+ *
+ * You should have received a copy of the GNU Lesser General Public
+ * License along with this library; if not, write to the Free Software
+ * Foundation, Inc., 51 Franklin St, Fifth Floor, Boston, MA  02110-1301  USA
+ *
+ *****************************************************************************/
+
+#ifndef MAPNIK_PYTHON_BINDING_WKB_INCLUDED
+#define MAPNIK_PYTHON_BINDING_WKB_INCLUDED
+
+// mapnik
+#include <mapnik/config.hpp>
+#include <mapnik/geometry.hpp>
+#include <mapnik/wkb.hpp>
+// stl
+#include <cstddef>
+
+namespace mapnik {
+
+// Parses one WKB geometry into geom, or rejects it: input shorter than the 5 byte
+// header (which the reader would read past), WKB the reader throws on, and
+// unknown geometry types, which the reader returns as geometry_empty.
+// Pure C++, safe to call without the GIL.
+inline bool parse_wkb(char const* data, std::size_t size, geometry::geometry<double> & geom)
+{
+    if (data == nullptr || size < 5) return false;
+    try
+    {
+        geom = geometry_utils::from_wkb(data, size);
+    }
+    catch (...)
+    {
+        return false;
+    }
+    return !geom.is<geometry::geometry_empty>();
+}
+
+} // namespace mapnik
+
+#endif // MAPNIK_PYTHON_BINDING_WKB_INCLUDED
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import mapnik
+import mapnik.aio
+import pytest
+
+
+def test_render_to_bytes():
+    m = mapnik.Map(64, 64)
+    m.background = mapnik.Color('green')
+    data = asyncio.run(mapnik.aio.render_to_bytes(m, 'png'))
+    im = mapnik.Image.from_string(data)
+    assert im.width() ==  64
+    assert im.get_pixel_color(0, 0) ==  mapnik.Color('green')
+
+
+def test_render_and_encode():
+    m = mapnik.Map(32, 32)
+    m.background = mapnik.Color('blue')
+    im = mapnik.Image(m.width, m.height)
+
+    async def run():
+        await mapnik.aio.render(m, im)
+        return await mapnik.aio.encode(im, 'png')
+
+    data = asyncio.run(run())
+    assert data ==  im.to_string('png')
+    assert im.get_pixel_color(0, 0) ==  mapnik.Color('blue')
+
+
+@pytest.fixture
+def single_worker():
+    workers = mapnik.aio.stats()['workers']
+    mapnik.aio.set_workers(1)
+    yield
+    mapnik.aio.set_workers(workers)
+
+
+def test_cancel_before_start(single_worker):
+    gate = threading.Event()
+    im = mapnik.Image(16, 16)
+
+    async def run():
+        # occupy the only worker so the next job stays queued
+        blocker = mapnik.aio._submit(gate.wait)
+        job = asyncio.ensure_future(mapnik.aio.encode(im, 'png'))
+        await asyncio.sleep(0.05)
+        assert mapnik.aio.stats()['queued'] ==  1
+        job.cancel()
+        await asyncio.sleep(0.05)
+        gate.set()
+        await blocker
+        return job
+
+    job = asyncio.run(run())
+    assert job.cancelled()
+    stats = mapnik.aio.stats()
+    assert stats['cancelled'] ==  1
+    assert stats['queued'] ==  0
+    assert stats['running'] ==  0
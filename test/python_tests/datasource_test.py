@@ -173,3 +173,26 @@ def test_hit_grid():
         # only test datasources that we have installed
         if not 'Could not create datasource' in str(e):
             raise RuntimeError(str(e))
+
+
+def test_lazy_plugin_registration(setup):
+    if not {'shape', 'geojson'} <= set(mapnik.DatasourceCache.plugin_names()):
+        return
+    import subprocess
+    script = '\n'.join([
+        'import mapnik',
+        "assert 'shape' not in mapnik.DatasourceCache.plugin_names()",
+        "mapnik.Shapefile(file='../data/shp/world_merc.shp')",
+        "assert mapnik.DatasourceCache.plugin_names() == ['shape']",
+        "mapnik.Datasource(type='geojson', inline='{\"type\":\"FeatureCollection\",\"features\":[]}')",
+        "assert sorted(mapnik.DatasourceCache.plugin_names()) == ['geojson', 'shape']",
+    ])
+    env = dict(os.environ, MAPNIK_LAZY_PLUGINS='1', MAPNIK_PLUGINS='shape,geojson')
+    subprocess.check_call([sys.executable, '-c', script], env=env)
+
+
+def test_register_plugins_missing_directory(tmp_path):
+    import subprocess
+    env = dict(os.environ, MAPNIK_PLUGINS='shape',
+               MAPNIK_INPUT_PLUGINS_DIRECTORY=str(tmp_path / 'missing'))
+    subprocess.check_call([sys.executable, '-c', 'import mapnik'], env=env)
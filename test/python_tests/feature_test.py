@@ -1,3 +1,4 @@
+import json
 from binascii import unhexlify
 import mapnik
 import pytest
@@ -113,3 +114,47 @@ def test_feature_from_geojson():
         }
         """
         mapnik.Feature.from_geojson(inline_string, ctx)
+
+
+def test_feature_values_by_index():
+    ctx = mapnik.Context()
+    ctx.push('name')
+    ctx.push('pop')
+    ctx.push('area')
+    f = mapnik.Feature(ctx, 1)
+    f['name'] = 'a'
+    f['pop'] = 10
+    assert len(ctx) ==  3
+    assert ctx.field_index('pop') ==  1
+    with pytest.raises(KeyError):
+        ctx.field_index('missing')
+    assert f.get_by_index(ctx.field_index('pop')) ==  10
+    assert f.get_by_index(2) is None
+    with pytest.raises(IndexError):
+        f.get_by_index(3)
+    assert f.values() ==  ('a', 10, None)
+
+
+def test_feature_batch():
+    batch = mapnik.FeatureBatch(['name', 'pop'])
+    batch.append(mapnik.Geometry.from_wkt('POINT(1 2)'), ['a', 10])
+    batch.append(mapnik.Geometry.from_wkt('POINT(3 4)'), {'name': 'b'})
+    batch.append(mapnik.Geometry.from_wkt('POINT(2 3)'), id=42)
+    assert len(batch) ==  3
+    assert batch.fields ==  ['name', 'pop']
+    f = batch[1]
+    assert f.id() ==  2
+    assert f['name'] ==  'b'
+    assert len(f.context()) ==  2
+    assert batch[-1].id() ==  42
+    with pytest.raises(IndexError):
+        batch[3]
+    with pytest.raises(KeyError):
+        batch.append(None, {'missing': 1})
+    ds = batch.to_datasource()
+    assert ds.num_features() ==  3
+    assert ds.envelope() ==  mapnik.Box2d(1, 2, 3, 4)
+    collection = json.loads(batch.to_geojson())
+    assert collection['type'] ==  'FeatureCollection'
+    assert len(collection['features']) ==  3
+    assert collection['features'][0]['properties'] ==  {'name': 'a', 'pop': 10}
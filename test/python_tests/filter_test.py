@@ -470,3 +470,26 @@ def test_division_by_zero():
 def test_invalid_syntax1():
     with pytest.raises(RuntimeError):
         mapnik.Expression('abs()')
+
+
+def _featureset():
+    md = mapnik.MemoryDatasource()
+    context = mapnik.Context()
+    context.push('pop')
+    for i in range(1, 6):
+        f = mapnik.Feature(context, i)
+        f['pop'] = i * 10
+        f.geometry = mapnik.Geometry.from_wkt('POINT(%d %d)' % (i, i))
+        md.add_feature(f)
+    return md.features(mapnik.Query(md.envelope()))
+
+
+def test_filter_featureset():
+    expr = mapnik.Expression('[pop] > @threshold')
+    ids = [f.id() for f in expr.filter(_featureset(), {'threshold': 25})]
+    assert ids ==  [3, 4, 5]
+
+
+def test_evaluate_many():
+    expr = mapnik.Expression('[pop] * @factor')
+    assert expr.evaluate_many(_featureset(), {'factor': 2}) ==  [20, 40, 60, 80, 100]
@@ -38,3 +38,84 @@ def test_loading_fontset_from_map(setup):
 #     m.append_style('Style',sty)
 #     serialized_map = mapnik.save_map_to_string(m)
 #     assert 'fontset-name="my-set"' in serialized_map == True
+
+
+def test_lazy_font_registration():
+    import subprocess
+    import sys
+    script = '\n'.join([
+        'import mapnik',
+        'assert mapnik._pending_registrations',
+        'm = mapnik.Map(16, 16)',
+        'mapnik.load_map_from_string(m, "<Map/>")',
+        'assert not mapnik._pending_registrations',
+        'assert len(mapnik.FontEngine.face_names()) > 0',
+    ])
+    env = dict(os.environ, MAPNIK_LAZY_FONTS='1')
+    subprocess.check_call([sys.executable, '-c', script], env=env)
+
+
+def test_lazy_font_registration_threads():
+    import subprocess
+    import sys
+    # a second thread must wait for the registration another thread is running
+    script = '\n'.join([
+        'import threading, time',
+        'import mapnik',
+        'started = threading.Event()',
+        'done = []',
+        'def slow():',
+        '    started.set()',
+        '    time.sleep(0.2)',
+        '    done.append(True)',
+        'mapnik._pending_registrations.insert(0, slow)',
+        't = threading.Thread(target=mapnik.FontEngine.face_names)',
+        't.start()',
+        'started.wait()',
+        'assert len(mapnik.FontEngine.face_names()) > 0',
+        'assert done and not mapnik._pending_registrations',
+        't.join()',
+    ])
+    env = dict(os.environ, MAPNIK_LAZY_FONTS='1')
+    subprocess.check_call([sys.executable, '-c', script], env=env)
+
+
+def test_font_index(tmp_path):
+    index = str(tmp_path / 'fonts.idx')
+    mapnik.register_fonts(index=index)
+    assert os.path.exists(index)
+    files = mapnik.FontEngine.load_index(index)
+    assert len(files) > 0
+    faces = mapnik.FontEngine.face_names()
+    mapnik.register_fonts(index=index)
+    assert mapnik.FontEngine.face_names() ==  faces
+
+
+def test_font_index_records_files_without_faces(tmp_path):
+    fonts = tmp_path / 'fonts'
+    fonts.mkdir()
+    broken = fonts / 'broken.ttf'
+    broken.write_bytes(b'not a font')
+    index = str(tmp_path / 'fonts.idx')
+    mapnik.register_fonts(str(fonts), index=index)
+    assert mapnik.FontEngine.load_index(index) ==  [str(broken)]
+    # nothing new to probe: the index is not rewritten
+    mtime = os.stat(index).st_mtime_ns
+    mapnik.register_fonts(str(fonts), index=index)
+    assert os.stat(index).st_mtime_ns ==  mtime
+
+
+def test_font_index_damaged_line(tmp_path):
+    index = str(tmp_path / 'fonts.idx')
+    mapnik.register_fonts(index=index)
+    with open(index, 'a') as f:
+        f.write('Broken Face\tnot-a-number\t/nonexistent.ttf\t1\t2\n')
+    assert len(mapnik.FontEngine.load_index(index)) > 0
+    assert 'Broken Face' not in mapnik.FontEngine.face_names()
+
+
+def test_font_index_invalid(tmp_path):
+    index = tmp_path / 'fonts.idx'
+    index.write_text('not an index\n')
+    with pytest.raises(RuntimeError):
+        mapnik.FontEngine.load_index(str(index))
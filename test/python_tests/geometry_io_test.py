@@ -330,3 +330,44 @@ def test_handling_invalid_geojson_empty_geometries():
     with pytest.raises(RuntimeError):
         for json in invalid_empty_geometries:
             mapnik.Geometry.from_geojson(json)
+
+
+def test_from_wkb_many():
+    items = [unhexlify(wkb[2]) for wkb in wkts]
+    truncated = b'\x01\x02'
+    unsupported = unhexlify(unsupported_wkb[1][1])
+    garbage = b'\x01\x63\x00\x00\x00' + bytes(16)
+    geoms, invalid = mapnik.Geometry.from_wkb_many(items + [truncated, unsupported, garbage, None])
+    assert invalid ==  [len(items), len(items) + 1, len(items) + 2, len(items) + 3]
+    assert geoms[len(items) + 1] is None
+    assert geoms[-1] is None
+    for geom, wkb in zip(geoms, wkts):
+        assert geom.type() ==  wkb[0]
+
+    collection, invalid = mapnik.Geometry.from_wkb_many([bytearray(items[0]), truncated], collection=True)
+    assert len(collection) ==  1
+    assert invalid ==  [1]
+
+
+def test_from_wkt_and_geojson_many():
+    geoms, invalid = mapnik.Geometry.from_wkt_many(['POINT(1 2)', 'POINT(', b'LINESTRING(0 0,1 1)'])
+    assert invalid ==  [1]
+    assert geoms[0].to_wkt() ==  'POINT(1 2)'
+    assert geoms[2].type() ==  mapnik.GeometryType.LineString
+
+    geoms, invalid = mapnik.Geometry.from_geojson_many(['{"type":"Point","coordinates":[1,2]}', '{}'])
+    assert invalid ==  [1]
+    assert geoms[0].to_geojson() ==  '{"type":"Point","coordinates":[1,2]}'
+
+
+def test_from_wkb_many_arrow():
+    pa = pytest.importorskip('pyarrow')
+    items = [unhexlify(wkb[2]) for wkb in wkts]
+    for array in (pa.array(items + [None], pa.binary()), pa.array(items + [None], pa.large_binary())):
+        geoms, invalid = mapnik.Geometry.from_wkb_many(array)
+        assert invalid ==  [len(items)]
+        assert [g.type() for g in geoms[:-1]] ==  [wkb[0] for wkb in wkts]
+
+    geoms, invalid = mapnik.Geometry.from_wkt_many(pa.array(['POINT(1 2)', 'POINT(3 4)']).slice(1))
+    assert invalid ==  []
+    assert geoms[0].to_wkt() ==  'POINT(3 4)'
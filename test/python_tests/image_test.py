@@ -375,3 +375,92 @@ def test_image_open_from_string():
     # TODO - https://github.com/mapnik/mapnik/issues/1831
     assert len(mapnik.Image.from_string(im1.to_string('tiff')).to_string()) ==  length
     assert len(mapnik.Image.from_memoryview(memoryview(im1.to_string('tiff'))).to_string()) ==  length
+
+
+def test_image_buffer_protocol():
+    im = mapnik.Image(4, 2)
+    im.fill(mapnik.Color(255, 0, 0, 128))
+    view = memoryview(im)
+    assert view.format ==  'B'
+    assert view.shape ==  (2, 4, 4)
+    assert view.strides ==  (16, 4, 1)
+    assert view.tobytes() ==  im.to_string()
+    assert view.tobytes()[:4] ==  bytes([255, 0, 0, 128])
+    # writes through the view are visible in the image
+    view.cast('B')[0] = 0
+    c = im.get_pixel_color(0, 0)
+    assert c.r ==  0
+    assert c.a ==  128
+
+
+def test_image_buffer_protocol_gray():
+    im = mapnik.Image(3, 5, mapnik.ImageType.gray16)
+    im.set_pixel(2, 4, 999)
+    view = memoryview(im)
+    assert view.format ==  'H'
+    assert view.shape ==  (5, 3)
+    assert view[4, 2] ==  999
+    im = mapnik.Image(3, 5, mapnik.ImageType.gray32f)
+    assert memoryview(im).format ==  'f'
+    im = mapnik.Image(3, 5, mapnik.ImageType.gray64s)
+    assert memoryview(im).itemsize ==  8
+
+
+def test_image_array_interface():
+    np = pytest.importorskip('numpy')
+    im = mapnik.Image(8, 4)
+    assert im.__array_interface__['shape'] ==  (4, 8, 4)
+    assert im.__array_interface__['typestr'] ==  '|u1'
+    pixels = np.asarray(im)
+    assert pixels.shape ==  (4, 8, 4)
+    assert pixels.dtype ==  np.uint8
+    pixels[1, 2] = [0, 255, 0, 255]
+    c = im.get_pixel_color(2, 1)
+    assert (c.r, c.g, c.b, c.a) ==  (0, 255, 0, 255)
+    gray = np.asarray(mapnik.Image(8, 4, mapnik.ImageType.gray32f))
+    assert gray.dtype ==  np.float32
+    assert gray.shape ==  (4, 8)
+
+
+def test_image_frombuffer_shares_memory():
+    data = bytearray(4 * 2 * 4)
+    im = mapnik.Image.frombuffer(data, 4, 2)
+    assert im.get_type() ==  mapnik.ImageType.rgba8
+    assert im.width() ==  4
+    assert im.height() ==  2
+    data[0:4] = bytes([255, 0, 0, 255])
+    c = im.get_pixel_color(0, 0)
+    assert (c.r, c.g, c.b, c.a) ==  (255, 0, 0, 255)
+    im.fill(mapnik.Color(0, 0, 255, 255))
+    assert data[0:4] ==  bytes([0, 0, 255, 255])
+
+
+def test_image_frombuffer_copy():
+    data = bytearray(3 * 3 * 2)
+    im = mapnik.Image.frombuffer(data, 3, 3, mapnik.ImageType.gray16, copy=True)
+    data[0] = 7
+    assert im.get_pixel(0, 0) ==  0
+    # read-only buffers are always copied
+    im = mapnik.Image.frombuffer(bytes(3 * 3 * 2), 3, 3, mapnik.ImageType.gray16)
+    im.set_pixel(0, 0, 999)
+    assert im.get_pixel(0, 0) ==  999
+
+
+def test_image_frombuffer_invalid_size():
+    with pytest.raises(RuntimeError):
+        mapnik.Image.frombuffer(bytearray(10), 4, 4)
+    with pytest.raises(RuntimeError):
+        mapnik.Image.frombuffer(bytearray(4 * 4 * 4), 4, 4, mapnik.ImageType.gray64f)
+
+
+def test_image_encoding_in_threads():
+    from concurrent.futures import ThreadPoolExecutor
+    im = mapnik.Image(256, 256)
+    im.fill(mapnik.Color('steelblue'))
+    expected = im.to_string('png8')
+    view = im.view(0, 0, 128, 128)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: im.to_string('png8'), range(8)))
+        views = list(executor.map(lambda _: view.to_string('png'), range(8)))
+    assert all(r ==  expected for r in results)
+    assert len(set(views)) ==  1
@@ -55,3 +55,27 @@ def test_introspect_symbolizers(setup):
     assert p2.allow_overlap ==  True
     assert p2.opacity ==  0.5
     assert str(p2.file) == '../data/images/dummy.png'
+
+
+def test_startup_profile():
+    profile = mapnik.startup_profile()
+    for phase in ('bootstrap_env', 'import _mapnik', 'register_plugins',
+                  'register_fonts', '_mapnik.export_map'):
+        assert phase in profile
+    assert all(seconds >= 0 for seconds in profile.values())
+
+
+def test_startup_profile_first_use():
+    import subprocess
+    import sys
+    script = '\n'.join([
+        'import mapnik',
+        'm = mapnik.Map(16, 16)',
+        'mapnik.load_map_from_string(m, "<Map/>")',
+        'mapnik.render(m, mapnik.Image(16, 16))',
+        'profile = mapnik.startup_profile()',
+        "assert 'first load_map_from_string' in profile",
+        "assert 'first render' in profile",
+    ])
+    env = dict(os.environ, MAPNIK_PROFILE_IMPORT='1')
+    subprocess.check_call([sys.executable, '-c', script], env=env)
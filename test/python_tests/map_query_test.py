@@ -104,3 +104,36 @@ if 'shape' in mapnik.DatasourceCache.plugin_names():
         fs = m.query_map_point(0, 55, 100)  # somewhere in Canada
         feat = next(fs)
         assert feat.attributes['NAME'] ==  u'Canada'
+
+
+def _layer(name, wkts):
+    md = mapnik.MemoryDatasource()
+    context = mapnik.Context()
+    context.push('name')
+    for i, wkt in enumerate(wkts):
+        f = mapnik.Feature(context, i + 1)
+        f['name'] = '%s%d' % (name, i + 1)
+        f.geometry = mapnik.Geometry.from_wkt(wkt)
+        md.add_feature(f)
+    lyr = mapnik.Layer(name)
+    lyr.datasource = md
+    return lyr
+
+
+def test_map_query_box_and_point_all():
+    m = mapnik.Map(256, 256)
+    m.layers.append(_layer('a', ['POINT(1 1)', 'POINT(8 8)']))
+    m.layers.append(_layer('b', ['POINT(1.5 1.5)']))
+    m.zoom_to_box(mapnik.Box2d(0, 0, 10, 10))
+    results = m.query_box(mapnik.Box2d(0, 0, 2, 2))
+    assert sorted(results) ==  ['a', 'b']
+    assert [f['name'] for f in results['a']] ==  ['a1']
+    assert [f['name'] for f in results['b']] ==  ['b1']
+    results = m.query_box(mapnik.Box2d(0, 0, 10, 10), layers=['a'], fields=['name'])
+    assert list(results) ==  ['a']
+    assert len(results['a']) ==  2
+    with pytest.raises(KeyError):
+        m.query_box(mapnik.Box2d(0, 0, 10, 10), layers=['missing'])
+    results = m.query_point_all(8, 8)
+    assert [f['name'] for f in results['a']] ==  ['a2']
+    assert results['b'] ==  []
@@ -1,4 +1,5 @@
 import mapnik
+import pytest
 
 def test_add_feature():
     md = mapnik.MemoryDatasource()
@@ -26,3 +27,211 @@ def test_add_feature():
     for feat in featureset:
         retrieved.append(feat)
     assert len(retrieved) ==  0
+
+
+def _points_datasource():
+    md = mapnik.MemoryDatasource()
+    context = mapnik.Context()
+    context.push('name')
+    context.push('pop')
+    context.push('area')
+    for i in range(1, 4):
+        feature = mapnik.Feature(context, i)
+        feature['name'] = 'p%d' % i
+        feature['pop'] = i * 10
+        if i != 2:
+            feature['area'] = i * 1.5
+        feature.geometry = mapnik.Geometry.from_wkt('POINT(%d %d)' % (i, i + 1))
+        md.add_feature(feature)
+    return md
+
+
+def test_to_columns():
+    np = pytest.importorskip('numpy')
+    md = _points_datasource()
+    cols = md.to_columns(mapnik.Query(md.envelope()), fields=['name', 'pop', 'area'])
+    assert cols['id'].tolist() ==  [1, 2, 3]
+    assert cols['envelope'].shape ==  (3, 4)
+    assert cols['envelope'][0].tolist() ==  [1.0, 2.0, 1.0, 2.0]
+    assert mapnik.Geometry.from_wkb(cols['wkb'][2]).to_wkt() ==  'POINT(3 4)'
+    fields = cols['fields']
+    assert fields['name'].tolist() ==  ['p1', 'p2', 'p3']
+    assert fields['pop'].dtype ==  np.int64
+    assert fields['pop'].tolist() ==  [10, 20, 30]
+    assert fields['area'].dtype ==  np.float64
+    assert np.isnan(fields['area'][1])
+
+
+def test_read_batch():
+    pytest.importorskip('numpy')
+    md = _points_datasource()
+    fs = md.features(mapnik.Query(md.envelope()))
+    batch = fs.read_batch(2)
+    assert batch['id'].tolist() ==  [1, 2]
+    assert list(batch['fields']) ==  ['name', 'pop', 'area']
+    batch = fs.read_batch(2)
+    assert batch['id'].tolist() ==  [3]
+    assert fs.read_batch(2) is None
+
+
+def test_to_arrow():
+    pa = pytest.importorskip('pyarrow')
+    md = _points_datasource()
+    stream = md.to_arrow(mapnik.Query(md.envelope()), fields=['name', 'pop', 'area'], batch_size=2)
+    table = pa.RecordBatchReader.from_stream(stream).read_all()
+    assert table.column_names ==  ['fid', 'geometry', 'name', 'pop', 'area']
+    assert table.num_rows ==  3
+    assert table['fid'].to_pylist() ==  [1, 2, 3]
+    assert table['pop'].type ==  pa.int64()
+    assert table['area'].to_pylist() ==  [1.5, None, 4.5]
+    assert table.schema.field('geometry').metadata[b'ARROW:extension:name'] ==  b'geoarrow.wkb'
+    wkb = table['geometry'][0].as_py()
+    assert mapnik.Geometry.from_wkb(wkb).to_wkt() ==  'POINT(1 2)'
+    with pytest.raises(RuntimeError):
+        stream.__arrow_c_stream__()
+
+
+def _mixed_datasource(values):
+    md = mapnik.MemoryDatasource()
+    context = mapnik.Context()
+    context.push('v')
+    for i, v in enumerate(values, 1):
+        feature = mapnik.Feature(context, i)
+        feature['v'] = v
+        feature.geometry = mapnik.Geometry.from_wkt('POINT(%d 0)' % i)
+        md.add_feature(feature)
+    return md
+
+
+def test_to_columns_and_to_arrow_types():
+    np = pytest.importorskip('numpy')
+    pa = pytest.importorskip('pyarrow')
+    md = _mixed_datasource([1, 2.5])
+    query = mapnik.Query(md.envelope())
+    assert md.to_columns(query, fields=['v'])['fields']['v'].dtype ==  np.float64
+    table = pa.RecordBatchReader.from_stream(md.to_arrow(query, fields=['v'])).read_all()
+    assert table['v'].type ==  pa.float64()
+    assert table['v'].to_pylist() ==  [1.0, 2.5]
+
+    md = _mixed_datasource([1, 'a'])
+    assert md.to_columns(query, fields=['v'])['fields']['v'].tolist() ==  [1, 'a']
+    table = pa.RecordBatchReader.from_stream(md.to_arrow(query, fields=['v'])).read_all()
+    assert table['v'].type ==  pa.large_string()
+    assert table['v'].to_pylist() ==  ['1', 'a']
+
+
+def test_to_arrow_value_not_fitting_first_batch():
+    pa = pytest.importorskip('pyarrow')
+    md = _mixed_datasource([True, 'yes'])
+    stream = md.to_arrow(mapnik.Query(md.envelope()), fields=['v'], batch_size=1)
+    with pytest.raises(OSError, match='does not fit'):
+        pa.RecordBatchReader.from_stream(stream).read_all()
+
+
+def test_from_arrays():
+    np = pytest.importorskip('numpy')
+    xs = np.array([0.0, 10.0, 5.0])
+    ys = np.array([0.0, 20.0, 5.0])
+    md = mapnik.MemoryDatasource.from_arrays(xs, ys, name=['a', 'b', 'c'], pop=np.array([1, 2, 3]))
+    assert md.num_features() ==  3
+    assert md.envelope() ==  mapnik.Box2d(0, 0, 10, 20)
+    features = list(md.features_at_point(mapnik.Coord(10, 20)))
+    assert len(features) ==  1
+    assert features[0].id() ==  2
+    assert features[0]['name'] ==  'b'
+    assert features[0]['pop'] ==  2
+    with pytest.raises(RuntimeError):
+        mapnik.MemoryDatasource.from_arrays(xs, ys, name=['a'])
+
+
+def test_from_arrays_column_conversion():
+    np = pytest.importorskip('numpy')
+    xs = np.array([0.0, 1.0])
+    ys = np.array([0.0, 1.0])
+    md = mapnik.MemoryDatasource.from_arrays(xs, ys, pop=[np.int64(7), np.bool_(True)],
+                                             big=np.array([1, 2], dtype=np.uint64))
+    features = list(md.features(mapnik.Query(md.envelope())))
+    assert [f['pop'] for f in features] ==  [7, True]
+    assert [f['big'] for f in features] ==  [1, 2]
+    with pytest.raises(RuntimeError):
+        mapnik.MemoryDatasource.from_arrays(xs, ys, big=np.array([1, 2**63], dtype=np.uint64))
+    with pytest.raises(RuntimeError):
+        mapnik.MemoryDatasource.from_arrays(xs, ys, pop=np.zeros((2, 1)))
+
+
+def test_from_wkb():
+    wkbs = [mapnik.Geometry.from_wkt(wkt).to_wkb(mapnik.wkbByteOrder.NDR)
+            for wkt in ('POINT(1 1)', 'LINESTRING(0 0,4 3)')]
+    md = mapnik.MemoryDatasource.from_wkb(wkbs, {'kind': ['point', 'line']})
+    assert md.num_features() ==  2
+    assert md.envelope() ==  mapnik.Box2d(0, 0, 4, 3)
+    features = list(md.features(mapnik.Query(md.envelope())))
+    assert [f['kind'] for f in features] ==  ['point', 'line']
+    assert features[1].geometry.to_wkt() ==  'LINESTRING(0 0,4 3)'
+    offsets = [0, len(wkbs[0]), len(wkbs[0]) + len(wkbs[1])]
+    md = mapnik.MemoryDatasource.from_wkb(b''.join(wkbs), offsets=offsets)
+    assert md.num_features() ==  2
+    with pytest.raises(RuntimeError):
+        mapnik.MemoryDatasource.from_wkb([b'\x01\x02'])
+    with pytest.raises(RuntimeError):
+        # unknown geometry type
+        mapnik.MemoryDatasource.from_wkb([b'\x01\x63\x00\x00\x00' + bytes(8)])
+    with pytest.raises(TypeError):
+        mapnik.MemoryDatasource.from_wkb(wkbs, [['point', 'line']])
+    np = pytest.importorskip('numpy')
+    strided = np.frombuffer(b''.join(wkbs) * 2, dtype=np.uint8)[::2]
+    with pytest.raises(RuntimeError):
+        mapnik.MemoryDatasource.from_wkb(strided, offsets=offsets)
+
+
+def test_spatial_index():
+    md = mapnik.MemoryDatasource()
+    context = mapnik.Context()
+    for i in range(100):
+        feature = mapnik.Feature(context, i + 1)
+        feature.geometry = mapnik.Geometry.from_wkt('POINT(%d %d)' % (i % 10, i // 10))
+        md.add_feature(feature)
+    assert not md.has_index()
+    md.build_index()
+    assert md.has_index()
+    ids = [f.id() for f in md.features(mapnik.Query(mapnik.Box2d(2.5, 2.5, 4.5, 3.5)))]
+    assert ids ==  [34, 35]
+    ids = [f.id() for f in md.features_at_point(mapnik.Coord(9, 9), 1)]
+    assert ids ==  [89, 90, 99, 100]
+    feature = mapnik.Feature(context, 101)
+    feature.geometry = mapnik.Geometry.from_wkt('POINT(3 3)')
+    md.add_feature(feature)
+    assert not md.has_index()
+    ids = [f.id() for f in md.features(mapnik.Query(mapnik.Box2d(2.5, 2.5, 4.5, 3.5)))]
+    assert ids ==  [34, 35, 101]
+
+
+def test_iter_features():
+    md = _points_datasource()
+    ids = [f.id() for f in md.iter_features()]
+    assert ids ==  [1, 2, 3]
+    ids = [f.id() for f in md.iter_features(bbox=mapnik.Box2d(1.5, 2.5, 3, 4))]
+    assert ids ==  [2, 3]
+    ids = [f.id() for f in md.iter_features(filter=mapnik.Expression('[pop] > 10'))]
+    assert ids ==  [2, 3]
+    ids = [f.id() for f in md.iter_features(filter=mapnik.Expression('[pop] > 10'), limit=1)]
+    assert ids ==  [2]
+    assert list(md.iter_features(limit=0)) ==  []
+
+
+def test_write_geojson(tmp_path):
+    import io
+    import json
+    md = _points_datasource()
+    stream = io.BytesIO()
+    count = mapnik.write_geojson(md.features(mapnik.Query(md.envelope())), stream, chunk_size=64)
+    assert count ==  3
+    collection = json.loads(stream.getvalue())
+    assert collection['type'] ==  'FeatureCollection'
+    assert [f['properties']['name'] for f in collection['features']] ==  ['p1', 'p2', 'p3']
+    text = io.StringIO()
+    mapnik.write_geojson(md.features(mapnik.Query(md.envelope())), text)
+    assert json.loads(text.getvalue()) ==  collection
+    path = tmp_path / 'points.geojson'
+    mapnik.write_geojson(md.features(mapnik.Query(md.envelope())), str(path))
+    assert json.loads(path.read_text()) ==  collection
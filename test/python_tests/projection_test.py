@@ -140,3 +140,75 @@ def test_proj_antimeridian_bbox():
     ext = mapnik.Box2d(274000, 3087000, 276000, 7173000)
     rev_ext = prj_trans_rev.backward(ext, PROJ_ENVELOPE_POINTS)
     assert_box2d_almost_equal(rev_ext, normal)
+
+
+def test_proj_transform_arrays_in_place():
+    np = pytest.importorskip('numpy')
+    tr = mapnik.ProjTransform(mapnik.Projection('epsg:4326'), mapnik.Projection('epsg:3857'))
+    lon = np.array([-122.5, 0.0, 151.2])
+    lat = np.array([45.1, 0.0, -33.9])
+    failed = tr.forward(lon, lat)
+    assert failed.dtype == np.bool_
+    assert not failed.any()
+    for i, (x, y) in enumerate([(-122.5, 45.1), (0.0, 0.0), (151.2, -33.9)]):
+        c = tr.forward(mapnik.Coord(x, y))
+        assert lon[i] == pytest.approx(c.x)
+        assert lat[i] == pytest.approx(c.y)
+
+    # interleaved buffer, round trip
+    xy = np.column_stack([lon, lat])
+    assert not tr.backward(xy).any()
+    assert xy[:, 0] == pytest.approx([-122.5, 0.0, 151.2])
+    assert xy[:, 1] == pytest.approx([45.1, 0.0, -33.9])
+
+
+def test_proj_transform_arrays_failed_points():
+    np = pytest.importorskip('numpy')
+    tr = mapnik.ProjTransform(mapnik.Projection('epsg:2193'), mapnik.Projection('epsg:4326'))
+    x = np.array([1574000.0, np.nan])
+    y = np.array([5180000.0, np.nan])
+    failed = tr.forward(x, y)
+    assert failed.tolist() == [False, True]
+    assert np.isnan(x[1]) and np.isnan(y[1])
+    with pytest.raises(RuntimeError):
+        tr.forward(np.zeros(2), np.zeros(3))
+
+
+def test_get_transform_cache():
+    mapnik.clear_transform_cache()
+    tr = mapnik.get_transform('epsg:4326', mapnik.Projection('epsg:3857'))
+    assert mapnik.get_transform(mapnik.Projection('epsg:4326'), 'epsg:3857') is tr
+    info = mapnik.transform_cache_info()
+    assert info['hits'] == 1
+    assert info['misses'] == 1
+    assert info['size'] == 1
+    c = tr.forward(mapnik.Coord(0, 0))
+    assert c.x == pytest.approx(0)
+
+    # least recently used entries are evicted first
+    mapnik.set_transform_cache_size(1)
+    try:
+        other = mapnik.get_transform('epsg:3857', 'epsg:4326')
+        assert mapnik.transform_cache_info()['size'] == 1
+        assert mapnik.get_transform('epsg:3857', 'epsg:4326') is other
+        assert mapnik.get_transform('epsg:4326', 'epsg:3857') is not tr
+    finally:
+        mapnik.set_transform_cache_size(64)
+        mapnik.clear_transform_cache()
+
+
+def test_proj_transform_boxes():
+    np = pytest.importorskip('numpy')
+    prj_trans_fwd = mapnik.ProjTransform(mapnik.Projection('epsg:2193'), mapnik.Projection('epsg:4326'))
+    box = mapnik.Box2d(274000, 3087000, 276000, 7173000)
+    boxes = np.array([[box.minx, box.miny, box.maxx, box.maxy]] * 600 + [[np.nan, 0, 1, 1]])
+    result = prj_trans_fwd.forward_boxes(boxes, points=20, threads=3)
+    assert result.shape == (601, 4)
+    expected = prj_trans_fwd.forward(box, 20)
+    for row in result[:600]:
+        assert_box2d_almost_equal(mapnik.Box2d(*row), expected)
+    assert np.isnan(result[600]).all()
+
+    back = prj_trans_fwd.backward_boxes(result[:1], points=20)
+    assert back[0][0] <= box.minx + 1
+    assert back[0][3] >= box.maxy - 1
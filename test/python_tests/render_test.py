@@ -255,3 +255,50 @@ if 'shape' in mapnik.DatasourceCache.plugin_names():
             actual = mapnik.Image.open(actual_file)
             expected = mapnik.Image.open(expected_file)
             assert actual.to_string('png32') == expected.to_string('png32'), 'failed comparing actual (%s) and expected (%s)' % (actual_file, expected_file)
+
+
+def test_render_metatile():
+    m = mapnik.Map(128, 128)
+    m.background = mapnik.Color('green')
+    im = mapnik.Image(m.width, m.height)
+    tiles = mapnik.render_metatile(m, im, 2, 64, 'png')
+    assert sorted(tiles.keys()) ==  [(0, 0), (0, 1), (1, 0), (1, 1)]
+    assert im.get_pixel_color(0, 0) ==  mapnik.Color('green')
+    for (x, y), data in tiles.items():
+        tile = mapnik.Image.from_string(data)
+        assert tile.width() ==  64
+        assert tile.height() ==  64
+        assert data ==  im.view(x * 64, y * 64, 64, 64).to_string('png')
+
+
+def test_render_metatile_too_small():
+    m = mapnik.Map(128, 128)
+    im = mapnik.Image(m.width, m.height)
+    with pytest.raises(RuntimeError):
+        mapnik.render_metatile(m, im, 4, 64, 'png')
+
+
+def test_map_copy():
+    import copy
+    m = mapnik.Map(256, 256, 'epsg:3857')
+    m.background = mapnik.Color('green')
+    m2 = copy.copy(m)
+    assert m2 ==  m
+    m2.resize(64, 64)
+    assert m.width ==  256
+    assert m2.width ==  64
+
+
+def test_render_pool():
+    m = mapnik.Map(256, 256)
+    m.background = mapnik.Color('green')
+    jobs = [(mapnik.Box2d(0, 0, i + 1, i + 1), 32 * (i + 1), 32 * (i + 1), 'png') for i in range(6)]
+    with mapnik.RenderPool(m, workers=3) as pool:
+        results = list(pool.render(iter(jobs)))
+    assert sorted(job[1] for job, _ in results) ==  [32, 64, 96, 128, 160, 192]
+    for job, data in results:
+        im = mapnik.Image.from_string(data)
+        assert im.width() ==  job[1]
+        assert im.get_pixel_color(0, 0) ==  mapnik.Color('green')
+    # the original map is left untouched
+    assert m.width ==  256
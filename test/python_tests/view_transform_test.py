@@ -0,0 +1,48 @@
+import pickle
+import mapnik
+import pytest
+
+from .utilities import assert_box2d_almost_equal
+
+
+def test_view_transform():
+    tr = mapnik.ViewTransform(256, 128, mapnik.Box2d(0, 0, 100, 50))
+    assert tr.scale_x() == pytest.approx(2.56)
+    assert tr.scale_y() == pytest.approx(2.56)
+    c = tr.forward(mapnik.Coord(0, 50))
+    assert c.x == pytest.approx(0)
+    assert c.y == pytest.approx(0)
+    c = tr.backward(mapnik.Coord(256, 128))
+    assert c.x == pytest.approx(100)
+    assert c.y == pytest.approx(0)
+    assert_box2d_almost_equal(tr.backward(tr.forward(mapnik.Box2d(10, 10, 20, 20))), mapnik.Box2d(10, 10, 20, 20))
+
+    tr2 = pickle.loads(pickle.dumps(tr))
+    assert tr2.forward(mapnik.Coord(50, 25)).x == pytest.approx(128)
+
+
+def test_map_view_transform():
+    m = mapnik.Map(256, 256)
+    m.zoom_to_box(mapnik.Box2d(-180, -90, 180, 90))
+    tr = m.view_transform()
+    c = tr.forward(mapnik.Coord(m.envelope().minx, m.envelope().maxy))
+    assert c.x == pytest.approx(0)
+    assert c.y == pytest.approx(0)
+
+
+def test_view_transform_arrays():
+    np = pytest.importorskip('numpy')
+    tr = mapnik.ViewTransform(256, 128, mapnik.Box2d(0, 0, 100, 50))
+    x = np.array([0.0, 50.0, 100.0])
+    y = np.array([50.0, 25.0, 0.0])
+    assert tr.forward(x, y) is None
+    assert x.tolist() == pytest.approx([0, 128, 256])
+    assert y.tolist() == pytest.approx([0, 64, 128])
+
+    xy = np.column_stack([x, y])
+    tr.backward(xy)
+    assert xy[:, 0].tolist() == pytest.approx([0, 50, 100])
+    assert xy[:, 1].tolist() == pytest.approx([50, 25, 0])
+
+    with pytest.raises(TypeError):
+        tr.forward(np.zeros(2, dtype=np.int32), np.zeros(2, dtype=np.int32))